@@ -32,9 +32,17 @@ def get_or_create_cart(request):
 
 
 def get_cart_total_items(request):
-    """Get total items in cart for context processor."""
+    """Get total items in cart for context processor.
+
+    Never starts a session or a cart for anonymous visitors: catalog pages
+    rendered without one stay cookie-free, so the caching proxy can share them.
+    """
     try:
-        cart = get_or_create_cart(request)
-        return cart.total_items
+        if request.user.is_authenticated:
+            cart = get_or_create_cart(request)
+        else:
+            session_key = request.session.session_key
+            cart = Cart.objects.filter(session_key=session_key).first() if session_key else None
+        return cart.total_items if cart else 0
     except:
         return 0
\ No newline at end of file
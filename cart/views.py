@@ -8,7 +8,7 @@ from django.urls import reverse
 import json
 
 from .models import Cart, CartItem, WishlistItem
-from products.models import Product
+from products.models import Product, product_card_related
 from .forms import AddToCartForm
 from .utils import get_or_create_cart
 
@@ -18,7 +18,7 @@ def cart_detail(request):
     cart = get_or_create_cart(request)
     context = {
         'cart': cart,
-        'cart_items': cart.items.select_related('product__brand').prefetch_related('product__images'),
+        'cart_items': cart.items.select_related(*product_card_related('product')),
     }
     return render(request, 'cart/cart_detail.html', context)
 
@@ -208,8 +208,8 @@ def clear_cart(request):
 def wishlist_view(request):
     """Display user's wishlist."""
     wishlist_items = WishlistItem.objects.filter(user=request.user).select_related(
-        'product__brand'
-    ).prefetch_related('product__images')
+        *product_card_related('product')
+    )
     
     context = {
         'wishlist_items': wishlist_items,
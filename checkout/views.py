@@ -5,6 +5,7 @@ from django.views.decorators.http import require_POST
 from django.http import JsonResponse
 from django.urls import reverse
 from django.db import transaction
+from django.db.models import Prefetch
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
@@ -12,6 +13,7 @@ from decimal import Decimal
 import json
 
 from cart.utils import get_or_create_cart
+from products.models import product_card_related
 from .models import Order, OrderItem, ShippingMethod, OrderStatusHistory
 from .forms import (
     CheckoutContactForm, ShippingAddressForm, BillingAddressForm,
@@ -315,10 +317,10 @@ def checkout_success(request, order_number):
     """Order success page."""
     try:
         if request.user.is_authenticated:
-            order = Order.objects.get(order_number=order_number, user=request.user)
+            order = Order.objects.prefetch_related(order_items_prefetch()).get(order_number=order_number, user=request.user)
         else:
             # For guest orders, check session or email
-            order = Order.objects.get(order_number=order_number)
+            order = Order.objects.prefetch_related(order_items_prefetch()).get(order_number=order_number)
     except Order.DoesNotExist:
         messages.error(request, 'Order not found.')
         return redirect('shop:home')
@@ -332,7 +334,9 @@ def checkout_success(request, order_number):
 @login_required
 def order_detail(request, order_number):
     """View order details."""
-    order = get_object_or_404(Order, order_number=order_number, user=request.user)
+    order = get_object_or_404(
+        Order.objects.prefetch_related(order_items_prefetch()), order_number=order_number, user=request.user
+    )
     
     context = {
         'order': order,
@@ -343,7 +347,7 @@ def order_detail(request, order_number):
 @login_required
 def order_list(request):
     """List user's orders."""
-    orders = Order.objects.filter(user=request.user).prefetch_related('items__product')
+    orders = Order.objects.filter(user=request.user).prefetch_related(order_items_prefetch())
     
     context = {
         'orders': orders,
@@ -470,13 +474,19 @@ def get_checkout_cart(request):
     cart_id = request.session.get('checkout_cart_id')
     if cart_id:
         try:
-            from cart.models import Cart
-            return Cart.objects.get(id=cart_id)
+            from cart.models import Cart, CartItem
+            items = CartItem.objects.select_related(*product_card_related('product'))
+            return Cart.objects.prefetch_related(Prefetch('items', queryset=items)).get(id=cart_id)
         except Cart.DoesNotExist:
             pass
     return None
 
 
+def order_items_prefetch():
+    """Prefetch order items together with what their product cards render."""
+    return Prefetch('items', queryset=OrderItem.objects.select_related(*product_card_related('product')))
+
+
 def create_order_from_session(request, cart, total_amount, shipping_cost, tax_amount):
     """Create order from session data."""
     contact_data = request.session.get('checkout_contact', {})
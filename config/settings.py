@@ -22,6 +22,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -45,6 +46,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.gzip.GZipMiddleware',
+    'shop.cdn.SurrogateControlMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -101,6 +103,29 @@ CACHES = {
     }
 }
 
+# In-process autocomplete index for search suggestions (per worker)
+AUTOCOMPLETE_IN_MEMORY = env.bool('AUTOCOMPLETE_IN_MEMORY', default=False)
+AUTOCOMPLETE_MAX_BYTES = env.int('AUTOCOMPLETE_MAX_BYTES', default=32 * 1024 * 1024)
+AUTOCOMPLETE_SYNC_INTERVAL = env.int('AUTOCOMPLETE_SYNC_INTERVAL', default=5)
+
+# Threads per worker process generating responsive image renditions
+IMAGE_RENDITION_WORKERS = env.int('IMAGE_RENDITION_WORKERS', default=2)
+
+# Serve product listings (list, home, search) from the flat ProductCard table
+CATALOG_READ_MODEL = env.bool('CATALOG_READ_MODEL', default=False)
+
+# Catalog export feeds: pre-generated files, links in them and the price currency
+CATALOG_FEED_ROOT = env('CATALOG_FEED_ROOT', default=str(BASE_DIR / 'media' / 'feeds'))
+CATALOG_FEED_BASE_URL = env('CATALOG_FEED_BASE_URL', default='http://localhost:8000')
+CATALOG_FEED_CURRENCY = env('CATALOG_FEED_CURRENCY', default='USD')
+
+# Caching reverse proxy: lifetime of pages shared by all visitors and the surrogate-key purge endpoint
+CDN_SURROGATE_MAX_AGE = env.int('CDN_SURROGATE_MAX_AGE', default=3600)
+CDN_PURGE_URL = env('CDN_PURGE_URL', default='')
+CDN_PURGE_TOKEN = env('CDN_PURGE_TOKEN', default='')
+CDN_PURGE_BATCH_SIZE = env.int('CDN_PURGE_BATCH_SIZE', default=256)
+CDN_PURGE_TIMEOUT = env.int('CDN_PURGE_TIMEOUT', default=5)
+
 # Session engine
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
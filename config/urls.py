@@ -5,6 +5,8 @@ from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
 from django.views.i18n import set_language
 
+from products import views as product_views
+
 # Import admin customization
 from . import admin as admin_config
 
@@ -12,6 +14,10 @@ from . import admin as admin_config
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('set_language/', set_language, name='set_language'),
+    path('api/', include('products.api_urls', namespace='api')),
+    path('sitemap.xml', product_views.sitemap_index, name='sitemap_index'),
+    path('sitemap-pages.xml', product_views.sitemap_pages, name='sitemap_pages'),
+    path('sitemap-products-<int:chunk>.xml', product_views.sitemap_products, name='sitemap_products'),
 ]
 
 # Translated URLs with language prefix
@@ -1,9 +1,13 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 from django.utils.html import format_html
 from .models import (
     Category, Brand, Product, ProductImage, 
-    ProductAttribute, ProductAttributeValue, ProductReview
+    ProductAttribute, ProductAttributeValue, ProductPartNumber, ProductReview,
+    VehicleMake, VehicleModel, ProductFitment,
+    ProductRecommendation, CoPurchaseBatch
 )
+from .part_numbers import normalize_part_number
 
 
 class ProductImageInline(admin.TabularInline):
@@ -26,6 +30,41 @@ class ProductAttributeValueInline(admin.TabularInline):
     extra = 1
 
 
+class ProductPartNumberFormSet(BaseInlineFormSet):
+    """Reject part numbers that differ only in punctuation or case within a product."""
+    
+    def clean(self):
+        super().clean()
+        seen = set()
+        for form in self.forms:
+            if not form.cleaned_data or self._should_delete_form(form):
+                continue
+            number = normalize_part_number(form.cleaned_data.get('number'))
+            if number in seen:
+                form.add_error('number', 'This product already has this part number.')
+            seen.add(number)
+
+
+class ProductPartNumberInline(admin.TabularInline):
+    """Inline admin for OEM and cross-reference part numbers."""
+    model = ProductPartNumber
+    formset = ProductPartNumberFormSet
+    extra = 1
+    fields = ('kind', 'manufacturer', 'number')
+
+
+class ProductFitmentInline(admin.TabularInline):
+    """Read-only inline showing fitments derived from the compatibility fields."""
+    model = ProductFitment
+    extra = 0
+    fields = ('make', 'model', 'year_from', 'year_to')
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 class ProductReviewInline(admin.TabularInline):
     """Inline admin for product reviews."""
     model = ProductReview
@@ -108,7 +147,9 @@ class ProductAdmin(admin.ModelAdmin):
         'is_active', 'is_featured', 'condition', 'category', 'brand', 
         'created_at', 'manage_stock'
     )
-    search_fields = ('name', 'sku', 'description', 'compatible_makes', 'compatible_models')
+    search_fields = (
+        'name', 'sku', 'description', 'compatible_makes', 'compatible_models', 'part_numbers__number'
+    )
     prepopulated_fields = {'slug': ('name', 'sku')}
     list_editable = ('is_active', 'is_featured', 'stock_quantity')
     readonly_fields = ('created_at', 'updated_at', 'average_rating', 'review_count')
@@ -152,7 +193,10 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
     
-    inlines = [ProductImageInline, ProductAttributeValueInline, ProductReviewInline]
+    inlines = [
+        ProductImageInline, ProductAttributeValueInline, ProductPartNumberInline,
+        ProductFitmentInline, ProductReviewInline,
+    ]
     
     def get_price_display(self, obj):
         if obj.is_on_sale:
@@ -225,3 +269,49 @@ class ProductReviewAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('product', 'user')
+
+
+class VehicleModelInline(admin.TabularInline):
+    """Inline admin for vehicle models."""
+    model = VehicleModel
+    extra = 1
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(VehicleMake)
+class VehicleMakeAdmin(admin.ModelAdmin):
+    """Admin configuration for VehicleMake model."""
+    list_display = ('name', 'slug')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+    inlines = [VehicleModelInline]
+
+
+@admin.register(ProductFitment)
+class ProductFitmentAdmin(admin.ModelAdmin):
+    """Admin configuration for ProductFitment model."""
+    list_display = ('product', 'make', 'model', 'year_from', 'year_to')
+    list_filter = ('make',)
+    search_fields = ('product__name', 'product__sku', 'make__name', 'model__name')
+    raw_id_fields = ('product',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product', 'make', 'model')
+
+
+@admin.register(ProductRecommendation)
+class ProductRecommendationAdmin(admin.ModelAdmin):
+    """Admin configuration for ProductRecommendation model (built by build_recommendations)."""
+    list_display = ('product', 'rank', 'related', 'score')
+    search_fields = ('product__name', 'product__sku')
+    raw_id_fields = ('product', 'related')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product', 'related')
+
+
+@admin.register(CoPurchaseBatch)
+class CoPurchaseBatchAdmin(admin.ModelAdmin):
+    """Admin configuration for CoPurchaseBatch model."""
+    list_display = ('last_order_id', 'orders', 'pairs', 'products_updated', 'created_at')
+    readonly_fields = ('last_order_id', 'orders', 'pairs', 'products_updated', 'created_at')
@@ -0,0 +1,246 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .categories import get_category_node, get_descendant_ids
+from .models import Product, ProductReview, Category, Brand
+from .serializers import (
+    ProductSerializer, ProductDetailSerializer, ProductReviewSerializer, CategorySerializer, BrandSerializer,
+)
+from .versioning import (
+    get_version, get_versions, get_catalog_version, reviews_namespace, images_namespace, attributes_namespace,
+    CATALOG_NAMESPACE, ATTRIBUTES_NAMESPACE,
+)
+
+
+API_MAX_AGE = 60
+API_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Serialized products, keyed by product id and the versions they depend on.
+API_PRODUCT_CACHE_KEY = 'api:product:{}:{}'
+API_PRODUCT_DETAIL_CACHE_KEY = 'api:product-detail:{}:{}'
+API_LIST_CACHE_KEY = 'api:{}:{}'
+
+
+class CatalogCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-pk'
+
+
+class ReviewCursorPagination(CatalogCursorPagination):
+    ordering = '-created_at'
+
+
+def parse_fields(request, serializer_class):
+    """Field names requested with ?fields=a,b (None for all of them)."""
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = sorted(set(requested) - set(serializer_class.Meta.fields))
+    if unknown:
+        raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+    return requested
+
+
+def sparse(items, fields):
+    if fields is None:
+        return items
+    return [{field: item[field] for field in fields} for item in items]
+
+
+def _serialize(serializer_class, objects):
+    # Representations are cached and shared across languages, so URLs in
+    # them always use the default language.
+    with translation.override(settings.LANGUAGE_CODE):
+        return serializer_class(objects, many=True).data
+
+
+def get_product_representations(product_ids):
+    """Serialized products in the given order, from the cache where possible.
+
+    Misses are loaded and serialized together in one query.
+    """
+    version = get_catalog_version()
+    keys = {pk: API_PRODUCT_CACHE_KEY.format(pk, version) for pk in product_ids}
+    found = cache.get_many(list(keys.values()))
+    representations = {pk: found[key] for pk, key in keys.items() if key in found}
+
+    missing = [pk for pk in product_ids if pk not in representations]
+    if missing:
+        products = Product.objects.filter(pk__in=missing).select_related('category').for_cards()
+        fresh = {item['id']: item for item in _serialize(ProductSerializer, products)}
+        cache.set_many({keys[pk]: item for pk, item in fresh.items()}, API_CACHE_TIMEOUT)
+        representations.update(fresh)
+    return [representations[pk] for pk in product_ids if pk in representations]
+
+
+def get_product_detail_version(product_id):
+    """Version string covering everything a product detail representation shows."""
+    versions = get_versions([
+        CATALOG_NAMESPACE, ATTRIBUTES_NAMESPACE, images_namespace(product_id), attributes_namespace(product_id),
+    ])
+    return '.'.join(str(versions[namespace]) for namespace in sorted(versions))
+
+
+def get_product_detail_representation(product_id, version):
+    key = API_PRODUCT_DETAIL_CACHE_KEY.format(product_id, version)
+    representation = cache.get(key)
+    if representation is None:
+        products = Product.objects.filter(pk=product_id).select_related('category').for_cards().prefetch_related(
+            'images', 'attributes__attribute'
+        )
+        representation = _serialize(ProductDetailSerializer, products)[0]
+        cache.set(key, representation, API_CACHE_TIMEOUT)
+    return representation
+
+
+class CatalogAPIMixin:
+    """Public, anonymous, JSON-only endpoints with ETag and Cache-Control headers.
+
+    No authentication is run, so responses never depend on the user and can
+    be cached by browsers and shared caches alike.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    renderer_classes = (JSONRenderer,)
+
+    def conditional(self, etag, build):
+        """Answer 304 if the client already has `etag`, else build and tag the response."""
+        etag = quote_etag(etag)
+        not_modified = get_conditional_response(self.request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = build()
+        response['ETag'] = etag
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=API_MAX_AGE)
+        return response
+
+
+class ProductViewSet(CatalogAPIMixin, viewsets.GenericViewSet):
+    """Active products, filterable by ?category=, ?brand= and ?updated_since=."""
+
+    lookup_field = 'slug'
+    pagination_class = CatalogCursorPagination
+
+    def get_queryset(self):
+        queryset = Product.objects.filter(is_active=True)
+        params = self.request.query_params
+
+        category_slug = params.get('category')
+        if category_slug:
+            # Includes products filed under subcategories
+            node = get_category_node(slug=category_slug)
+            queryset = queryset.filter(category_id__in=get_descendant_ids(node['id']) if node else [])
+        brand_slug = params.get('brand')
+        if brand_slug:
+            queryset = queryset.filter(brand__slug=brand_slug)
+        updated_since = params.get('updated_since')
+        if updated_since:
+            moment = parse_datetime(updated_since)
+            if moment is None:
+                raise ValidationError({'updated_since': 'Expected an ISO 8601 date and time.'})
+            queryset = queryset.filter(updated_at__gte=moment)
+        return queryset
+
+    def get_product_id(self, slug):
+        product_id = Product.objects.filter(slug=slug, is_active=True).values_list('pk', flat=True).first()
+        if product_id is None:
+            raise Http404('No such product')
+        return product_id
+
+    def list(self, request):
+        fields = parse_fields(request, ProductSerializer)
+
+        def build():
+            # Only ids come from the database; the products themselves come
+            # from the representation cache.
+            page = self.paginate_queryset(self.get_queryset().values('pk'))
+            items = get_product_representations([row['pk'] for row in page])
+            return self.get_paginated_response(sparse(items, fields))
+
+        return self.conditional(f'products-{get_catalog_version()}', build)
+
+    def retrieve(self, request, slug=None):
+        fields = parse_fields(request, ProductDetailSerializer)
+        product_id = self.get_product_id(slug)
+        version = get_product_detail_version(product_id)
+        return self.conditional(f'product-{version}', lambda: Response(
+            sparse([get_product_detail_representation(product_id, version)], fields)[0]
+        ))
+
+    @action(detail=True, pagination_class=ReviewCursorPagination)
+    def reviews(self, request, slug=None):
+        """Approved reviews of a product, newest first."""
+        fields = parse_fields(request, ProductReviewSerializer)
+        product_id = self.get_product_id(slug)
+
+        def build():
+            reviews = ProductReview.objects.filter(product_id=product_id, is_approved=True).select_related('user')
+            page = self.paginate_queryset(reviews)
+            return self.get_paginated_response(sparse(ProductReviewSerializer(page, many=True).data, fields))
+
+        return self.conditional(f'reviews-{get_version(reviews_namespace(product_id))}', build)
+
+
+class CachedListViewSet(CatalogAPIMixin, viewsets.ViewSet):
+    """Small unpaginated lists cached whole per catalog version."""
+
+    serializer_class = None
+    name_prefix = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def list(self, request):
+        fields = parse_fields(request, self.serializer_class)
+        version = get_catalog_version()
+
+        def build():
+            key = API_LIST_CACHE_KEY.format(self.name_prefix, version)
+            items = cache.get(key)
+            if items is None:
+                items = _serialize(self.serializer_class, self.get_queryset())
+                cache.set(key, items, API_CACHE_TIMEOUT)
+            return Response(sparse(items, fields))
+
+        return self.conditional(f'{self.name_prefix}-{version}', build)
+
+
+class CategoryViewSet(CachedListViewSet):
+    """Active categories in tree order."""
+
+    serializer_class = CategorySerializer
+    name_prefix = 'categories'
+
+    def get_queryset(self):
+        return Category.objects.filter(is_active=True).order_by('path')
+
+
+class BrandViewSet(CachedListViewSet):
+    """Active brands by name."""
+
+    serializer_class = BrandSerializer
+    name_prefix = 'brands'
+
+    def get_queryset(self):
+        return Brand.objects.filter(is_active=True).order_by('name')
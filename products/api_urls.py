@@ -0,0 +1,12 @@
+from rest_framework.routers import DefaultRouter
+
+from . import api
+
+app_name = 'api'
+
+router = DefaultRouter()
+router.register('products', api.ProductViewSet, basename='product')
+router.register('categories', api.CategoryViewSet, basename='category')
+router.register('brands', api.BrandViewSet, basename='brand')
+
+urlpatterns = router.urls
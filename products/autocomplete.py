@@ -0,0 +1,292 @@
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import translate_url
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'autocomplete:version'
+CHANGE_CACHE_KEY = 'autocomplete:change:{}'
+CHANGE_LOG_TIMEOUT = 60 * 60
+MAX_REPLAY = 500
+SCAN_LIMIT = 500
+
+PRODUCT = 'product'
+CATEGORY = 'category'
+BRAND = 'brand'
+
+
+def _normalize(value):
+    return ' '.join(str(value).lower().split())
+
+
+def _suffixes(value):
+    """Keys for every word start, so "brake" also finds "Ceramic Brake Pads"."""
+    words = _normalize(value).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def _default_language_url(obj):
+    # URLs are stored once for the default language and translated on lookup.
+    with translation.override(settings.LANGUAGE_CODE):
+        return obj.get_absolute_url()
+
+
+def _sizeof(keys, entry):
+    size = sys.getsizeof(entry) + sum(sys.getsizeof(v) for v in entry.values())
+    # Each key lives in a (key, entry_id) tuple inside the sorted array.
+    return size + sum(sys.getsizeof(key) + 72 for key in keys)
+
+
+class AutocompleteIndex:
+    """Sorted-array prefix index holding precomputed suggestion entries.
+    
+    Keys are normalized product name words, SKUs, brand names and category
+    names; each worker builds its own copy lazily and replays the change log
+    that catalog signals publish in the shared cache.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.version = 0
+        self.bytes_used = 0
+        self.truncated = False
+        self.built_at = None
+        self._keys = []
+        # False while build() appends keys, which it sorts once at the end
+        self._sorted = True
+        self._entries = {}
+        self._entry_keys = {}
+        self._entry_sizes = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def is_complete(self):
+        return self.built_at is not None and not self.truncated
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'keys': len(self._keys),
+            'bytes': self.bytes_used,
+            'max_bytes': self.max_bytes,
+            'truncated': self.truncated,
+            'version': self.version,
+        }
+
+    def add(self, entry_id, keys, entry):
+        self.remove(entry_id)
+        keys = sorted(set(key for key in keys if key))
+        size = _sizeof(keys, entry)
+        if self.bytes_used + size > self.max_bytes:
+            self.truncated = True
+            return False
+        if self._sorted:
+            for key in keys:
+                insort(self._keys, (key, entry_id))
+        else:
+            self._keys.extend((key, entry_id) for key in keys)
+        self._entries[entry_id] = entry
+        self._entry_keys[entry_id] = keys
+        self._entry_sizes[entry_id] = size
+        self.bytes_used += size
+        return True
+
+    def remove(self, entry_id):
+        keys = self._entry_keys.pop(entry_id, None)
+        if keys is None:
+            return
+        for key in keys:
+            position = bisect_left(self._keys, (key, entry_id))
+            if position < len(self._keys) and self._keys[position] == (key, entry_id):
+                del self._keys[position]
+        del self._entries[entry_id]
+        self.bytes_used -= self._entry_sizes.pop(entry_id)
+
+    def add_product(self, product):
+        return self.add((PRODUCT, product.pk), [
+            *_suffixes(product.name),
+            _normalize(product.sku),
+            *_suffixes(product.brand.name),
+        ], {
+            'type': PRODUCT,
+            'name': product.name,
+            'brand': product.brand.name,
+            'brand_id': product.brand_id,
+            'url': _default_language_url(product),
+            'price': str(product.get_price),
+        })
+
+    def add_category(self, category):
+        return self.add((CATEGORY, category.pk), _suffixes(category.name), {
+            'type': CATEGORY,
+            'name': category.name,
+            'url': _default_language_url(category),
+        })
+
+    def lookup(self, prefix, product_limit, category_limit):
+        """Return product and category entries whose keys start with prefix."""
+        products, categories, seen = [], [], set()
+        position = bisect_left(self._keys, (prefix,))
+        end = min(position + SCAN_LIMIT, len(self._keys))
+
+        while position < end:
+            key, entry_id = self._keys[position]
+            position += 1
+            if not key.startswith(prefix):
+                break
+            if entry_id in seen:
+                continue
+            seen.add(entry_id)
+            bucket, limit = (products, product_limit) if entry_id[0] == PRODUCT else (categories, category_limit)
+            if len(bucket) < limit:
+                bucket.append(self._entries[entry_id])
+            if len(products) >= product_limit and len(categories) >= category_limit:
+                break
+
+        return products, categories
+
+    def suggest(self, query, product_limit, category_limit):
+        """Build the suggestion payload served by `search_suggestions`."""
+        language = translation.get_language()
+        products, categories = self.lookup(query, product_limit, category_limit)
+
+        suggestions = []
+        for entry in products:
+            suggestions.append({
+                'type': PRODUCT,
+                'name': entry['name'],
+                'brand': entry['brand'],
+                'url': translate_url(entry['url'], language),
+                'price': entry['price'],
+            })
+        for entry in categories:
+            suggestions.append({
+                'type': CATEGORY,
+                'name': entry['name'],
+                'url': translate_url(entry['url'], language),
+            })
+        return suggestions
+
+    def build(self):
+        from .models import Product, Category
+
+        # Inserting each key in order would make building quadratic
+        self._sorted = False
+        try:
+            for category in Category.objects.filter(is_active=True).order_by('name'):
+                self.add_category(category)
+            for product in Product.objects.filter(is_active=True).select_related('brand').iterator(chunk_size=2000):
+                if not self.add_product(product):
+                    break
+        finally:
+            self._keys.sort()
+            self._sorted = True
+        self.built_at = time.time()
+
+    def refresh(self, kind, pk):
+        """Reload a single changed object (or a brand's products) from the database."""
+        from .models import Product, Category
+
+        if kind == PRODUCT:
+            self.remove((PRODUCT, pk))
+            product = Product.objects.filter(pk=pk, is_active=True).select_related('brand').first()
+            if product:
+                self.add_product(product)
+        elif kind == CATEGORY:
+            self.remove((CATEGORY, pk))
+            category = Category.objects.filter(pk=pk, is_active=True).first()
+            if category:
+                self.add_category(category)
+        elif kind == BRAND:
+            for entry_id, entry in list(self._entries.items()):
+                if entry.get('brand_id') == pk:
+                    self.remove(entry_id)
+            for product in Product.objects.filter(brand_id=pk, is_active=True).select_related('brand'):
+                self.add_product(product)
+
+
+_index = None
+_last_sync = 0.0
+_lock = threading.RLock()
+
+
+def is_enabled():
+    return getattr(settings, 'AUTOCOMPLETE_IN_MEMORY', False)
+
+
+def _global_version():
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def _rebuild():
+    global _index
+    index = AutocompleteIndex(getattr(settings, 'AUTOCOMPLETE_MAX_BYTES', 32 * 1024 * 1024))
+    index.version = _global_version()
+    started = time.monotonic()
+    index.build()
+    _index = index
+
+    stats = index.stats()
+    logger.info(
+        'Autocomplete index built in %.2fs: %d entries, %d keys, %.1f KiB%s',
+        time.monotonic() - started, stats['entries'], stats['keys'], stats['bytes'] / 1024,
+        ' (truncated at memory cap)' if index.truncated else '',
+    )
+    if index.truncated:
+        logger.warning('Autocomplete index exceeded AUTOCOMPLETE_MAX_BYTES; falling back to database suggestions.')
+
+
+def _sync():
+    """Replay catalog changes recorded by other workers since our version."""
+    version = _global_version()
+    if version == _index.version:
+        return
+    if version < _index.version or version - _index.version > MAX_REPLAY:
+        _rebuild()
+        return
+
+    keys = [CHANGE_CACHE_KEY.format(v) for v in range(_index.version + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) < len(keys):
+        # Part of the change log expired; start over.
+        _rebuild()
+        return
+
+    for kind, pk in dict.fromkeys(changes[key] for key in keys):
+        _index.refresh(kind, pk)
+    _index.version = version
+
+
+def get_autocomplete_index():
+    """Return this worker's index, building or syncing it when needed."""
+    global _last_sync
+    with _lock:
+        if _index is None:
+            _rebuild()
+            _last_sync = time.monotonic()
+        elif time.monotonic() - _last_sync >= getattr(settings, 'AUTOCOMPLETE_SYNC_INTERVAL', 5):
+            _sync()
+            _last_sync = time.monotonic()
+        return _index
+
+
+def record_change(kind, pk):
+    """Publish a catalog change to all workers and apply it locally right away."""
+    if not is_enabled():
+        return
+    cache.add(VERSION_CACHE_KEY, 0, None)
+    version = cache.incr(VERSION_CACHE_KEY)
+    cache.set(CHANGE_CACHE_KEY.format(version), (kind, pk), CHANGE_LOG_TIMEOUT)
+
+    with _lock:
+        if _index is not None:
+            _index.refresh(kind, pk)
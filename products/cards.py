@@ -0,0 +1,137 @@
+from django.conf import settings
+
+
+# Product fields the ProductCard read model is derived from. Brand and
+# category names come along through the foreign keys, and is_active decides
+# whether a product has a card at all.
+CARD_FIELDS = (
+    'name', 'slug', 'description', 'short_description', 'condition',
+    'brand', 'brand_id', 'category', 'category_id', 'primary_image', 'primary_image_id',
+    'price', 'sale_price', 'stock_quantity', 'low_stock_threshold', 'manage_stock',
+    'rating_sum', 'rating_count', 'rating_average',
+    'is_active', 'is_featured', 'created_at', 'search_vector', 'specs',
+)
+
+CARD_VALUES = (
+    'pk', 'name', 'slug', 'description', 'short_description', 'condition',
+    'brand_id', 'brand__name', 'brand__slug', 'category_id', 'category__name', 'category__slug',
+    'primary_image__image', 'price', 'sale_price', 'stock_quantity', 'low_stock_threshold', 'manage_stock',
+    'rating_sum', 'rating_count', 'rating_average', 'is_featured', 'created_at', 'search_vector', 'specs',
+)
+
+CARD_BATCH_SIZE = 1000
+
+
+def read_model_enabled():
+    """Whether listings read the ProductCard table instead of joining Product."""
+    return getattr(settings, 'CATALOG_READ_MODEL', False)
+
+
+def touches_card_fields(fields):
+    """Check whether a set of updated field names affects product cards."""
+    return any(field in CARD_FIELDS for field in fields)
+
+
+def card_values(product_model):
+    """CARD_VALUES limited to the fields the given product model has.
+
+    Data migrations pass historical models that predate later card fields.
+    """
+    names = {field.name for field in product_model._meta.get_fields()}
+    names.update(field.attname for field in product_model._meta.concrete_fields)
+    return [value for value in CARD_VALUES if value == 'pk' or value.split('__')[0] in names]
+
+
+def card_from_values(card_model, row):
+    """Build an unsaved card from a Product.values(*card_values(...)) row."""
+    price = row['price']
+    sale_price = row['sale_price']
+    is_on_sale = sale_price is not None and sale_price < price
+    description_field = card_model._meta.get_field('description')
+    card = card_model(
+        product_id=row['pk'],
+        name=row['name'],
+        slug=row['slug'],
+        description=row['description'][:description_field.max_length],
+        short_description=row['short_description'],
+        condition=row['condition'],
+        brand_id=row['brand_id'],
+        brand_name=row['brand__name'],
+        brand_slug=row['brand__slug'],
+        category_id=row['category_id'],
+        category_name=row['category__name'],
+        category_slug=row['category__slug'],
+        image=row['primary_image__image'] or '',
+        price=price,
+        effective_price=sale_price if sale_price else price,
+        is_on_sale=is_on_sale,
+        discount_percentage=round((price - sale_price) / price * 100) if is_on_sale else 0,
+        stock_quantity=row['stock_quantity'],
+        in_stock=not row['manage_stock'] or row['stock_quantity'] > 0,
+        rating_sum=row['rating_sum'],
+        rating_count=row['rating_count'],
+        rating_average=row['rating_average'],
+        is_featured=row['is_featured'],
+        created_at=row['created_at'],
+        search_vector=row['search_vector'],
+    )
+    # Set after construction, as historical card models may predate these fields.
+    card.low_stock = row['manage_stock'] and 0 < row['stock_quantity'] <= row['low_stock_threshold']
+    if 'specs' in row:
+        card.specs = row['specs']
+    return card
+
+
+def build_cards(product_model, card_model, product_ids=None, batch_size=CARD_BATCH_SIZE):
+    """Upsert the cards of active products and drop the cards of inactive ones.
+
+    Takes the model classes as arguments so data migrations can reuse it
+    with historical models. Returns the number of cards written.
+    """
+    products = product_model.objects.all()
+    cards = card_model.objects.all()
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        products = products.filter(pk__in=product_ids)
+        cards = cards.filter(product_id__in=product_ids)
+
+    update_fields = [
+        field.name for field in card_model._meta.concrete_fields if not field.primary_key
+    ]
+    written = 0
+    batch = []
+    rows = products.filter(is_active=True).order_by('pk').values(*card_values(product_model))
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(card_from_values(card_model, row))
+        if len(batch) >= batch_size:
+            card_model.objects.bulk_create(
+                batch, update_conflicts=True, unique_fields=['product'], update_fields=update_fields
+            )
+            written += len(batch)
+            batch = []
+    if batch:
+        card_model.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['product'], update_fields=update_fields
+        )
+        written += len(batch)
+
+    cards.filter(product__is_active=False).delete()
+    return written
+
+
+def refresh_product_cards(product_ids=None):
+    """Bring the cards of the given products (or all) in line with the catalog."""
+    from .models import Product, ProductCard
+
+    return build_cards(Product, ProductCard, product_ids)
+
+
+def listing_queryset():
+    """Base queryset for product listings: cards in read-model mode, else joined products."""
+    from .models import Product, ProductCard
+
+    if read_model_enabled():
+        return ProductCard.objects.all()
+    return Product.objects.filter(is_active=True).select_related('category').for_cards()
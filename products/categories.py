@@ -0,0 +1,108 @@
+from django.core.cache import cache
+
+from .versioning import get_version, bump_version
+
+
+# The whole category tree is small, so it is cached as one structure and
+# rebuilt from a single query whenever a category changes.
+CATEGORY_TREE_NAMESPACE = 'categories'
+CATEGORY_TREE_CACHE_TIMEOUT = 60 * 60 * 24
+
+PATH_SEPARATOR = '/'
+
+
+def build_path(parent_path, pk):
+    """Materialized path of a category, e.g. '/3/17/' for 17 under root 3."""
+    return f'{parent_path or PATH_SEPARATOR}{pk}{PATH_SEPARATOR}'
+
+
+def path_ids(path):
+    """Category ids along a path, root first."""
+    return [int(pk) for pk in path.strip(PATH_SEPARATOR).split(PATH_SEPARATOR) if pk]
+
+
+def path_depth(path):
+    return len(path_ids(path)) - 1
+
+
+def get_category_tree_version():
+    return get_version(CATEGORY_TREE_NAMESPACE)
+
+
+def invalidate_category_tree():
+    bump_version(CATEGORY_TREE_NAMESPACE)
+
+
+def build_category_tree():
+    """Return {'nodes': {pk: node}, 'roots': [pk, ...]} for the active tree.
+
+    Nodes are plain dicts (id, name, slug, parent_id, path, depth, children)
+    so the structure pickles cheaply into the cache. A category whose parent
+    is inactive is left out along with its whole subtree.
+    """
+    from .models import Category
+
+    rows = Category.objects.filter(is_active=True).order_by('depth', 'name').values(
+        'id', 'name', 'slug', 'parent_id', 'path', 'depth'
+    )
+    nodes = {}
+    roots = []
+    for row in rows:
+        if row['parent_id'] is not None and row['parent_id'] not in nodes:
+            continue
+        row['children'] = []
+        nodes[row['id']] = row
+        if row['parent_id'] is None:
+            roots.append(row['id'])
+        else:
+            nodes[row['parent_id']]['children'].append(row['id'])
+    return {'nodes': nodes, 'roots': roots}
+
+
+def get_category_tree():
+    """Return the cached category tree (see build_category_tree)."""
+    key = f'categories:tree:{get_category_tree_version()}'
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(key, tree, CATEGORY_TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def get_category_node(category_id=None, slug=None):
+    tree = get_category_tree()
+    if category_id is not None:
+        return tree['nodes'].get(category_id)
+    for node in tree['nodes'].values():
+        if node['slug'] == slug:
+            return node
+    return None
+
+
+def get_breadcrumbs(category_id):
+    """Ancestors of a category followed by the category itself, root first."""
+    nodes = get_category_tree()['nodes']
+    node = nodes.get(category_id)
+    if node is None:
+        return []
+    return [nodes[pk] for pk in path_ids(node['path']) if pk in nodes]
+
+
+def get_children(category_id):
+    tree = get_category_tree()
+    node = tree['nodes'].get(category_id)
+    return [tree['nodes'][pk] for pk in node['children']] if node else []
+
+
+def get_descendant_ids(category_id):
+    """Ids of an active category and all of its active descendants."""
+    nodes = get_category_tree()['nodes']
+    if category_id not in nodes:
+        return []
+    ids = []
+    stack = [category_id]
+    while stack:
+        pk = stack.pop()
+        ids.append(pk)
+        stack.extend(nodes[pk]['children'])
+    return ids
@@ -0,0 +1,71 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+def get_visitor_state(request):
+    """What every page shows that depends on the visitor rather than the catalog."""
+    from cart.utils import get_cart_total_items
+    from shop.models import SiteSettings
+
+    return (
+        translation.get_language(),
+        request.user.pk if request.user.is_authenticated else None,
+        # Forms embed a token derived from the CSRF cookie
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        get_cart_total_items(request),
+        SiteSettings.get_settings().updated_at,
+    )
+
+
+def get_page_etag(request, validator):
+    """Strong ETag for an HTML page from its own validator plus the visitor state."""
+    state = repr((validator, get_visitor_state(request)))
+    return '"%s"' % hashlib.md5(state.encode()).hexdigest()
+
+
+class ConditionalPageMixin:
+    """Answer GET with 304 Not Modified, without building any context, when the page is unchanged.
+
+    Views implement get_page_validator() returning cheap values that change
+    whenever the page's own content does (versions, timestamps). Responses
+    must always be revalidated; they are only public when nothing
+    visitor-specific went into them (see shop.cdn.is_shareable).
+    """
+
+    def get_page_validator(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        from shop.cdn import is_shareable
+
+        # Flash messages are shown once, so such a page is always rendered
+        if len(get_messages(request)):
+            return super().get(request, *args, **kwargs)
+
+        etag = get_page_etag(request, self.get_page_validator())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if is_shareable(request, response):
+            patch_cache_control(response, public=True, no_cache=True)
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ConditionalDetailMixin(ConditionalPageMixin):
+    """ConditionalPageMixin for detail views, looking the object up only once."""
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_page_object'):
+            self._page_object = super().get_object()
+        return self._page_object
@@ -0,0 +1,87 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from .versioning import get_versions, CATALOG_NAMESPACE
+
+
+# Result sets the planner expects to be at least this large are shown as an
+# estimate ("about N results") instead of being counted exactly.
+ESTIMATE_THRESHOLD = 10000
+COUNT_CACHE_TIMEOUT = 60 * 10
+
+
+class ResultCount(int):
+    """An int result count that remembers whether it is a planner estimate.
+
+    A capped count stands for "at least this many".
+    """
+
+    def __new__(cls, value, is_estimate=False, is_capped=False):
+        count = super().__new__(cls, value)
+        count.is_estimate = is_estimate
+        count.is_capped = is_capped
+        return count
+
+
+def _count_key(queryset, namespaces):
+    # The compiled SQL is the normalized form of the filter set.
+    sql, params = queryset.query.sql_with_params()
+    versions = get_versions(namespaces)
+    digest = hashlib.md5(f'{sql}|{params!r}|{sorted(versions.items())!r}'.encode()).hexdigest()
+    return f'count:{queryset.model._meta.label_lower}:{digest}'
+
+
+def table_estimate(model, using='default'):
+    """Row estimate for a whole table from pg_class.reltuples."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return max(row[0], 0) if row else 0
+
+
+def planner_estimate(queryset):
+    """Row estimate the query planner makes for a queryset (EXPLAIN)."""
+    if not queryset.query.where:
+        return table_estimate(queryset.model, queryset.db)
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_result_count(queryset, namespaces=(CATALOG_NAMESPACE,)):
+    """Count a queryset through the cache, estimating very large result sets.
+
+    Cached entries are keyed by the compiled query and by the versions of
+    `namespaces`, so bumping one of those versions invalidates them.
+    """
+    queryset = queryset.order_by()
+    if queryset.query.is_empty():
+        return ResultCount(0)
+    try:
+        key = _count_key(queryset, namespaces)
+    except EmptyResultSet:
+        # Filters that can never match, such as an empty id list, compile to no SQL
+        return ResultCount(0)
+    cached = cache.get(key)
+    if cached is not None:
+        return ResultCount(*cached)
+
+    estimate = planner_estimate(queryset)
+    if estimate >= ESTIMATE_THRESHOLD:
+        # Estimates can be far off for selective filters; a count capped at
+        # the threshold is cheap and tells us whether the set is really large.
+        capped = queryset[:ESTIMATE_THRESHOLD].count()
+        if capped < ESTIMATE_THRESHOLD:
+            result = ResultCount(capped)
+        else:
+            result = ResultCount(max(estimate, capped), is_estimate=True)
+    else:
+        result = ResultCount(queryset.count())
+
+    cache.set(key, (int(result), result.is_estimate), COUNT_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,119 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .search import get_search_config
+from .specs import ATTRIBUTE_PARAM_PREFIX, get_attribute_filters, compute_attribute_facets
+from .versioning import get_catalog_version
+
+
+# Request parameters that change the filtered product set, besides the
+# attr.<slug> attribute filters. Sorting and pagination do not, so they
+# are left out of the cache key.
+FACET_FILTER_PARAMS = (
+    'search', 'category', 'brand', 'min_price', 'max_price',
+    'condition', 'in_stock', 'make', 'model', 'year', 'min_rating',
+)
+
+# (min, max) price ranges; None means open-ended.
+PRICE_BUCKETS = [
+    (None, 25),
+    (25, 50),
+    (50, 100),
+    (100, 250),
+    (250, 500),
+    (500, None),
+]
+
+# "N stars & up" rating filters
+RATING_THRESHOLDS = (4, 3, 2, 1)
+
+FACET_CACHE_TIMEOUT = 60 * 10
+
+
+def normalize_filters(params):
+    """Return the active filters as a sorted tuple of (name, value) pairs."""
+    filters = []
+    for name in FACET_FILTER_PARAMS:
+        value = ' '.join(params.get(name, '').lower().split())
+        if value:
+            filters.append((name, value))
+    for slug, value in get_attribute_filters(params).items():
+        filters.append((f'{ATTRIBUTE_PARAM_PREFIX}{slug}', value))
+    return tuple(filters)
+
+
+def facet_cache_key(params, categories, brands):
+    filters = normalize_filters(params)
+    digest = hashlib.md5(repr((filters, categories, brands)).encode()).hexdigest()
+    # The search filter matches per language, through its text search config
+    return f'facets:{get_catalog_version()}:{get_search_config()}:{digest}'
+
+
+def _price_bucket_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def compute_facets(queryset, category_ids, brand_ids):
+    """Count every facet value for a filtered queryset.
+
+    One aggregate query covers the fixed facets and a second groups the
+    attribute values.
+    """
+    from .categories import get_descendant_ids
+    from .models import Product
+
+    aggregates = {'total': Count('pk')}
+    for pk in category_ids:
+        # Category counts include products filed under subcategories
+        ids = get_descendant_ids(pk) or [pk]
+        aggregates[f'category_{pk}'] = Count('pk', filter=Q(category_id__in=ids))
+    for pk in brand_ids:
+        aggregates[f'brand_{pk}'] = Count('pk', filter=Q(brand_id=pk))
+    for value, label in Product.CONDITION_CHOICES:
+        aggregates[f'condition_{value}'] = Count('pk', filter=Q(condition=value))
+    aggregates['in_stock'] = Count('pk', filter=Q(stock_quantity__gt=0))
+    for stars in RATING_THRESHOLDS:
+        aggregates[f'rating_{stars}'] = Count('pk', filter=Q(rating_average__gte=stars))
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f'price_{index}'] = Count('pk', filter=_price_bucket_filter(low, high))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        'total': counts['total'],
+        'categories': {pk: counts[f'category_{pk}'] for pk in category_ids},
+        'brands': {pk: counts[f'brand_{pk}'] for pk in brand_ids},
+        'conditions': [
+            {'value': value, 'label': label, 'count': counts[f'condition_{value}']}
+            for value, label in Product.CONDITION_CHOICES
+        ],
+        'in_stock': counts['in_stock'],
+        'ratings': [
+            {'stars': stars, 'count': counts[f'rating_{stars}']}
+            for stars in RATING_THRESHOLDS
+        ],
+        'price_buckets': [
+            {'min': low, 'max': high, 'count': counts[f'price_{index}']}
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'attributes': compute_attribute_facets(queryset),
+    }
+
+
+def get_facets(queryset, params, category_ids, brand_ids):
+    """Return facet counts for the filtered queryset, cached per filter set."""
+    category_ids = sorted(category_ids)
+    brand_ids = sorted(brand_ids)
+    key = facet_cache_key(params, category_ids, brand_ids)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, category_ids, brand_ids)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,223 @@
+import csv
+import gzip
+import io
+import json
+import os
+import zlib
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.urls import reverse
+
+from .versioning import get_catalog_version
+
+
+FEED_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'xml': 'application/xml; charset=utf-8',
+}
+# Rows fetched per server-side cursor round trip.
+FEED_CHUNK_SIZE = 2000
+# Encoded output is handed to the response in blocks of about this size.
+FEED_BLOCK_SIZE = 64 * 1024
+
+FEED_VALUES = (
+    'pk', 'sku', 'name', 'slug', 'short_description', 'condition',
+    'brand__name', 'category__name', 'price', 'sale_price',
+    'stock_quantity', 'manage_stock', 'primary_image__image', 'updated_at',
+)
+
+FEED_COLUMNS = (
+    'id', 'sku', 'title', 'description', 'brand', 'category', 'condition',
+    'price', 'sale_price', 'effective_price', 'currency', 'availability',
+    'stock_quantity', 'link', 'image_link', 'updated_at',
+)
+
+FEED_STATE_CACHE_KEY = 'feed:state:{}'
+
+
+def get_feed_state():
+    """Return (catalog version, newest product updated_at) for validators.
+
+    Every product, brand and category change bumps the catalog version, so
+    the aggregate is computed once per version.
+    """
+    version = get_catalog_version()
+    key = FEED_STATE_CACHE_KEY.format(version)
+    last_modified = cache.get(key)
+    if last_modified is None:
+        from .models import Product
+
+        last_modified = Product.objects.aggregate(newest=Max('updated_at'))['newest']
+        cache.set(key, last_modified, 60 * 60 * 24)
+    return version, last_modified
+
+
+def feed_items(base_url):
+    """Yield one dict per active product, reading the table in chunks."""
+    from .models import Product
+
+    # Resolve the URL prefix once rather than reversing per row.
+    placeholder = 'feed-slug-placeholder'
+    product_url = base_url + reverse('products:product_detail', kwargs={'slug': placeholder})
+    currency = settings.CATALOG_FEED_CURRENCY
+
+    rows = Product.objects.filter(is_active=True).order_by('pk').values(*FEED_VALUES)
+    for row in rows.iterator(chunk_size=FEED_CHUNK_SIZE):
+        price = row['price']
+        sale_price = row['sale_price']
+        in_stock = not row['manage_stock'] or row['stock_quantity'] > 0
+        image = row['primary_image__image']
+        yield {
+            'id': row['pk'],
+            'sku': row['sku'],
+            'title': row['name'],
+            'description': row['short_description'],
+            'brand': row['brand__name'],
+            'category': row['category__name'],
+            'condition': row['condition'],
+            'price': str(price),
+            'sale_price': str(sale_price) if sale_price else '',
+            'effective_price': str(sale_price if sale_price else price),
+            'currency': currency,
+            'availability': 'in_stock' if in_stock else 'out_of_stock',
+            'stock_quantity': row['stock_quantity'],
+            'link': product_url.replace(placeholder, row['slug']),
+            'image_link': base_url + default_storage.url(image) if image else '',
+            'updated_at': row['updated_at'].isoformat(),
+        }
+
+
+def csv_lines(items):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FEED_COLUMNS)
+    yield buffer.getvalue()
+    for item in items:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([item[column] for column in FEED_COLUMNS])
+        yield buffer.getvalue()
+
+
+def jsonl_lines(items):
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + '\n'
+
+
+def xml_lines(items):
+    """Merchant-center style RSS 2.0 feed with the g: namespace."""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+        '<title>Revline catalog</title>\n'
+    )
+    for item in items:
+        sale_price = f"<g:sale_price>{item['sale_price']} {item['currency']}</g:sale_price>" if item['sale_price'] else ''
+        yield (
+            '<item>'
+            f"<g:id>{item['id']}</g:id>"
+            f"<g:mpn>{escape(item['sku'])}</g:mpn>"
+            f"<title>{escape(item['title'])}</title>"
+            f"<description>{escape(item['description'])}</description>"
+            f"<link>{escape(item['link'])}</link>"
+            f"<g:image_link>{escape(item['image_link'])}</g:image_link>"
+            f"<g:brand>{escape(item['brand'])}</g:brand>"
+            f"<g:product_type>{escape(item['category'])}</g:product_type>"
+            f"<g:condition>{escape(item['condition'])}</g:condition>"
+            f"<g:availability>{item['availability'].replace('_', ' ')}</g:availability>"
+            f"<g:price>{item['price']} {item['currency']}</g:price>"
+            f'{sale_price}'
+            '</item>\n'
+        )
+    yield '</channel>\n</rss>\n'
+
+
+FEED_WRITERS = {
+    'csv': csv_lines,
+    'jsonl': jsonl_lines,
+    'xml': xml_lines,
+}
+
+
+def feed_chunks(feed_format, base_url):
+    """Yield the encoded feed in blocks of about FEED_BLOCK_SIZE bytes."""
+    block = []
+    size = 0
+    for line in FEED_WRITERS[feed_format](feed_items(base_url)):
+        data = line.encode('utf-8')
+        block.append(data)
+        size += len(data)
+        if size >= FEED_BLOCK_SIZE:
+            yield b''.join(block)
+            block = []
+            size = 0
+    if block:
+        yield b''.join(block)
+
+
+def gzip_chunks(chunks):
+    """Compress a byte stream into gzip format as it is produced."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Pre-generated feeds are kept gzipped next to a stamp of the catalog version
+# they were built from, and served as-is while that version is current.
+
+def feed_path(feed_format):
+    return os.path.join(settings.CATALOG_FEED_ROOT, f'catalog.{feed_format}.gz')
+
+
+def _stamp_path(feed_format):
+    return feed_path(feed_format) + '.version'
+
+
+def read_feed_stamp(feed_format):
+    try:
+        with open(_stamp_path(feed_format)) as stamp:
+            return stamp.read().strip()
+    except OSError:
+        return None
+
+
+def get_pregenerated_feed(feed_format):
+    """Path of the stored feed if it matches the current catalog, else None."""
+    version, _ = get_feed_state()
+    if read_feed_stamp(feed_format) == str(version) and os.path.exists(feed_path(feed_format)):
+        return feed_path(feed_format)
+    return None
+
+
+def write_feed(feed_format, base_url, force=False):
+    """Write the gzipped feed file unless it is already current.
+
+    The file is written to a temporary name and renamed into place, so
+    readers never see a partial feed. Returns True if the file was rebuilt.
+    """
+    version, _ = get_feed_state()
+    if not force and read_feed_stamp(feed_format) == str(version) and os.path.exists(feed_path(feed_format)):
+        return False
+
+    os.makedirs(settings.CATALOG_FEED_ROOT, exist_ok=True)
+    path = feed_path(feed_format)
+    with open(path + '.tmp', 'wb') as output:
+        for chunk in gzip_chunks(feed_chunks(feed_format, base_url)):
+            output.write(chunk)
+    os.replace(path + '.tmp', path)
+    with open(_stamp_path(feed_format), 'w') as stamp:
+        stamp.write(str(version))
+    return True
+
+
+def open_pregenerated_feed(path, compressed):
+    """Open a stored feed as bytes, decompressing for clients without gzip."""
+    return open(path, 'rb') if compressed else gzip.open(path, 'rb')
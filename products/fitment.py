@@ -0,0 +1,240 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .versioning import get_version, bump_version
+
+
+# Product fields the fitment rows are derived from. is_active is included
+# because only active products feed the vehicle picker lists.
+FITMENT_FIELDS = ('compatible_makes', 'compatible_models', 'year_from', 'year_to', 'is_active')
+
+# Open-ended year ranges are clamped to this window in the vehicle picker.
+VEHICLE_MIN_YEAR = 1980
+
+VEHICLE_CACHE_TIMEOUT = 60 * 60 * 24
+VEHICLE_MAKES_NAMESPACE = 'vehicles:makes'
+VEHICLE_MAKE_NAMESPACE = 'vehicles:make:{}'
+
+
+def touches_fitment_fields(fields):
+    """Check whether a set of updated field names affects product fitments."""
+    return any(field in FITMENT_FIELDS for field in fields)
+
+
+def split_list(value):
+    """Split a comma-separated compatibility string into clean names."""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def parse_compatibility(makes, models, known_models=None):
+    """Map the comma-separated compatibility strings to (make, model) pairs.
+    
+    Models are assigned to a make when they are prefixed with the make name
+    ("Audi A4"), when the product lists a single make, or when the model is
+    already known for exactly one of the listed makes. Makes without any
+    assigned model fit the whole make (model is None).
+    """
+    make_names = split_list(makes)
+    known_models = known_models or {}
+    pairs = []
+    matched_makes = set()
+
+    for model_name in split_list(models):
+        make_name = next(
+            (make for make in make_names if model_name.lower().startswith(make.lower() + ' ')),
+            None
+        )
+        if make_name:
+            model_name = model_name[len(make_name):].strip()
+        elif len(make_names) == 1:
+            make_name = make_names[0]
+        else:
+            candidates = [make for make in make_names if slugify(model_name) in known_models.get(slugify(make), ())]
+            if len(candidates) != 1:
+                continue
+            make_name = candidates[0]
+        pairs.append((make_name, model_name))
+        matched_makes.add(make_name)
+
+    pairs.extend((make, None) for make in make_names if make not in matched_makes)
+    return pairs
+
+
+def known_models_by_make(vehicle_model_model):
+    """Return {make_slug: {model_slug, ...}} for model assignment."""
+    known = {}
+    for make_slug, model_slug in vehicle_model_model.objects.values_list('make__slug', 'slug'):
+        known.setdefault(make_slug, set()).add(model_slug)
+    return known
+
+
+def build_fitments(product, make_model, vehicle_model_model, fitment_model, known_models=None, vehicles=None):
+    """Create make/model rows as needed and return unsaved fitments for a product.
+    
+    Takes the model classes as arguments so data migrations can reuse it
+    with historical models. Pass the same `vehicles` dict for a batch of
+    products so each make and model is only looked up once.
+    """
+    if vehicles is None:
+        vehicles = {}
+    fitments = {}
+    for make_name, model_name in parse_compatibility(product.compatible_makes, product.compatible_models, known_models):
+        make_key = (slugify(make_name), None)
+        make = vehicles.get(make_key)
+        if make is None:
+            make, _ = make_model.objects.get_or_create(slug=make_key[0], defaults={'name': make_name})
+            vehicles[make_key] = make
+        model = None
+        if model_name:
+            model_key = (make_key[0], slugify(model_name))
+            model = vehicles.get(model_key)
+            if model is None:
+                model, _ = vehicle_model_model.objects.get_or_create(
+                    make=make, slug=model_key[1], defaults={'name': model_name}
+                )
+                vehicles[model_key] = model
+        fitments[(make.pk, model.pk if model else None)] = fitment_model(
+            product_id=product.pk,
+            make=make,
+            model=model,
+            year_from=product.year_from,
+            year_to=product.year_to,
+        )
+    return list(fitments.values())
+
+
+def sync_product_fitments(products):
+    """Rebuild the fitment rows for the given products from their compatibility strings."""
+    from .models import VehicleMake, VehicleModel, ProductFitment
+
+    products = list(products)
+    if not products:
+        return
+    known_models = known_models_by_make(VehicleModel)
+
+    with transaction.atomic():
+        existing = ProductFitment.objects.filter(product__in=[product.pk for product in products])
+        make_ids = set(existing.values_list('make_id', flat=True))
+        existing.delete()
+        fitments = []
+        vehicles = {}
+        for product in products:
+            fitments.extend(build_fitments(product, VehicleMake, VehicleModel, ProductFitment, known_models, vehicles))
+        ProductFitment.objects.bulk_create(fitments)
+
+    make_ids.update(fitment.make_id for fitment in fitments)
+    invalidate_vehicle_lists(make_ids)
+
+
+def filter_by_vehicle(queryset, make=None, model=None, year=None):
+    """Restrict a Product queryset to parts that fit the given vehicle.
+    
+    `make` and `model` are slugs, `year` an integer. Slugs are resolved to ids
+    first so the EXISTS semi-join runs on the (make, model, year) index.
+    """
+    from .models import VehicleMake, VehicleModel, ProductFitment
+
+    if not make:
+        return queryset
+
+    make_id = VehicleMake.objects.filter(slug=make).values_list('pk', flat=True).first()
+    if make_id is None:
+        return queryset.none()
+    fitments = ProductFitment.objects.filter(product=OuterRef('pk'), make_id=make_id)
+
+    if model:
+        model_id = VehicleModel.objects.filter(make_id=make_id, slug=model).values_list('pk', flat=True).first()
+        if model_id is None:
+            fitments = fitments.filter(model__isnull=True)
+        else:
+            fitments = fitments.filter(Q(model__isnull=True) | Q(model_id=model_id))
+    if year:
+        fitments = fitments.filter(
+            Q(year_from__isnull=True) | Q(year_from__lte=year),
+            Q(year_to__isnull=True) | Q(year_to__gte=year),
+        )
+    return queryset.filter(Exists(fitments))
+
+
+def invalidate_vehicle_lists(make_ids):
+    """Bump the picker cache versions for the makes whose fitments changed."""
+    from .models import VehicleMake
+
+    if not make_ids:
+        return
+    make_slugs = VehicleMake.objects.filter(pk__in=make_ids).values_list('slug', flat=True)
+    bump_version(VEHICLE_MAKES_NAMESPACE, *(VEHICLE_MAKE_NAMESPACE.format(slug) for slug in make_slugs))
+
+
+def _active_fitments():
+    from .models import ProductFitment
+
+    return ProductFitment.objects.filter(product__is_active=True)
+
+
+def _cached(key, build):
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, VEHICLE_CACHE_TIMEOUT)
+    return value
+
+
+def get_vehicle_makes_version():
+    return get_version(VEHICLE_MAKES_NAMESPACE)
+
+
+def get_vehicle_make_version(make_slug):
+    return get_version(VEHICLE_MAKE_NAMESPACE.format(make_slug))
+
+
+def get_vehicle_makes():
+    """Return makes that have at least one active part."""
+    from .models import VehicleMake
+
+    def build():
+        return list(
+            VehicleMake.objects.filter(
+                Exists(_active_fitments().filter(make=OuterRef('pk')))
+            ).values('slug', 'name')
+        )
+
+    return _cached(f'vehicles:makes:{get_vehicle_makes_version()}', build)
+
+
+def get_vehicle_models(make_slug):
+    """Return the models of a make that have parts."""
+    from .models import VehicleModel
+
+    def build():
+        fitments = _active_fitments().filter(make__slug=make_slug)
+        models = VehicleModel.objects.filter(make__slug=make_slug)
+        if not fitments.filter(model__isnull=True).exists():
+            # No make-wide parts, so only list models with their own fitments.
+            models = models.filter(Exists(fitments.filter(model=OuterRef('pk'))))
+        return list(models.values('slug', 'name'))
+
+    version = get_vehicle_make_version(make_slug)
+    return _cached(f'vehicles:models:{make_slug}:{version}', build)
+
+
+def get_vehicle_years(make_slug, model_slug=None):
+    """Return the years (newest first) with parts for a make and optional model."""
+
+    def build():
+        fitments = _active_fitments().filter(make__slug=make_slug)
+        if model_slug:
+            fitments = fitments.filter(Q(model__isnull=True) | Q(model__slug=model_slug))
+        max_year = timezone.now().year + 1
+        years = set()
+        for year_from, year_to in fitments.values_list('year_from', 'year_to').distinct():
+            start = max(year_from or VEHICLE_MIN_YEAR, VEHICLE_MIN_YEAR)
+            end = min(year_to or max_year, max_year)
+            years.update(range(start, end + 1))
+        return sorted(years, reverse=True)
+
+    version = get_vehicle_make_version(make_slug)
+    return _cached(f'vehicles:years:{make_slug}:{model_slug or ""}:{version}', build)
@@ -0,0 +1,38 @@
+from django.utils.functional import SimpleLazyObject
+
+from .versioning import (
+    get_versions, CATALOG_NAMESPACE, ATTRIBUTES_NAMESPACE, RECOMMENDATIONS_NAMESPACE,
+    images_namespace, attributes_namespace, reviews_namespace,
+)
+
+
+# Rendered product detail fragments are keyed by product id, updated_at,
+# language and the versions below, so stale entries are never read and just
+# age out.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_fragment_versions(product_id):
+    """Return the version component of each detail fragment's cache key.
+
+    Every fragment also varies on the product's updated_at, so saving the
+    product itself invalidates all of them; the versions here let image,
+    attribute, review and recommendation changes invalidate only their own.
+    """
+    images = images_namespace(product_id)
+    attributes = attributes_namespace(product_id)
+    reviews = reviews_namespace(product_id)
+    versions = get_versions([
+        images, attributes, reviews, ATTRIBUTES_NAMESPACE, CATALOG_NAMESPACE, RECOMMENDATIONS_NAMESPACE,
+    ])
+    return {
+        'images': versions[images],
+        'attributes': f'{versions[attributes]}.{versions[ATTRIBUTES_NAMESPACE]}',
+        'reviews': versions[reviews],
+        'related': f'{versions[CATALOG_NAMESPACE]}.{versions[RECOMMENDATIONS_NAMESPACE]}',
+    }
+
+
+def lazy_list(func):
+    """A list that is only queried if a template fragment misses the cache."""
+    return SimpleLazyObject(lambda: list(func()))
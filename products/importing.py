@@ -0,0 +1,287 @@
+import csv
+import gzip
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+
+from .part_numbers import normalize_part_number
+
+
+# Rows upserted per INSERT ... ON CONFLICT statement (and per transaction).
+IMPORT_BATCH_SIZE = 2000
+# Print a progress line every this many rows read.
+PROGRESS_EVERY = 50000
+# Only the first few row errors are reported individually.
+MAX_REPORTED_ERRORS = 20
+
+# Every import file needs these columns; brand and category are names (or slugs).
+REQUIRED_COLUMNS = ('sku', 'name', 'price', 'brand', 'category')
+
+
+def parse_decimal(value):
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f'invalid number {value!r}')
+    if not number.is_finite():
+        raise ValueError(f'invalid number {value!r}')
+    return number
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in ('1', 'true', 'yes', 'y'):
+        return True
+    if value in ('0', 'false', 'no', 'n', ''):
+        return False
+    raise ValueError(f'invalid boolean {value!r}')
+
+
+def parse_text(value):
+    return str(value).strip()
+
+
+# Product columns an import file may carry, with the parser for each. Columns
+# a row leaves out or empty are left untouched on existing products and take
+# the model default on new ones.
+IMPORT_FIELDS = {
+    'name': parse_text,
+    'description': parse_text,
+    'short_description': parse_text,
+    'price': parse_decimal,
+    'sale_price': parse_decimal,
+    'cost': parse_decimal,
+    'stock_quantity': int,
+    'low_stock_threshold': int,
+    'manage_stock': parse_bool,
+    'weight': parse_decimal,
+    'dimensions': parse_text,
+    'condition': parse_text,
+    'compatible_makes': parse_text,
+    'compatible_models': parse_text,
+    'year_from': int,
+    'year_to': int,
+    'is_active': parse_bool,
+    'is_featured': parse_bool,
+    'meta_title': parse_text,
+    'meta_description': parse_text,
+}
+
+
+class RowError(ValueError):
+    """A row that cannot be imported."""
+
+
+def open_catalog_file(path):
+    """Open an import file as text, transparently decompressing .gz files."""
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def guess_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'jsonl' if name.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(stream, file_format):
+    """Yield (line_number, row dict) from a CSV or JSON Lines stream, one at a time."""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as exc:
+                yield line_number, RowError(f'invalid JSON: {exc}')
+
+
+class NameLookup:
+    """In-memory name/slug -> id map for brands or categories.
+
+    Loaded once per import; unknown names are created on first use when
+    `create_missing` is set, so each distinct name costs at most one query.
+    """
+
+    def __init__(self, model, create_missing=True):
+        self.model = model
+        self.create_missing = create_missing
+        self.ids = {}
+        self.created = 0
+        for pk, name, slug in model.objects.values_list('pk', 'name', 'slug'):
+            self.ids[name.lower()] = pk
+            self.ids[slug] = pk
+
+    def resolve(self, name):
+        name = parse_text(name)
+        if not name:
+            raise RowError(f'missing {self.model._meta.verbose_name}')
+        key = name.lower()
+        pk = self.ids.get(key) or self.ids.get(slugify(name))
+        if pk is None:
+            if not self.create_missing:
+                raise RowError(f'unknown {self.model._meta.verbose_name} {name!r}')
+            # save() rather than bulk_create so slugs, category paths and
+            # signals are handled as for admin-created rows.
+            obj = self.model(name=name)
+            obj.save()
+            pk = obj.pk
+            self.created += 1
+            self.ids[obj.slug] = pk
+        self.ids[key] = pk
+        return pk
+
+
+def build_product(product_model, row, brands, categories):
+    """Turn one import row into an unsaved Product and the import fields it sets.
+
+    Raises RowError on bad data, including values the columns cannot hold
+    (too long, out of range, not one of the choices), which would otherwise
+    fail the whole batch's upsert.
+    """
+    if isinstance(row, Exception):
+        raise row
+    sku = parse_text(row.get('sku') or '')
+    if not sku:
+        raise RowError('missing sku')
+
+    values = {}
+    for column in IMPORT_FIELDS:
+        raw = row.get(column)
+        if raw is None or raw == '':
+            continue
+        try:
+            values[column] = IMPORT_FIELDS[column](raw)
+        except (TypeError, ValueError) as exc:
+            raise RowError(f'{column}: {exc}')
+
+    if not values.get('name'):
+        raise RowError('missing name')
+    if not values.get('price') or values['price'] <= 0:
+        raise RowError('price must be positive')
+
+    slug_length = product_model._meta.get_field('slug').max_length
+    product = product_model(
+        sku=sku,
+        slug=slugify(f"{values['name']}-{sku}")[:slug_length],
+        brand_id=brands.resolve(row.get('brand') or ''),
+        category_id=categories.resolve(row.get('category') or ''),
+        **values,
+    )
+    # Only the fields the row sets; clean() and unique checks would cost queries per row.
+    checked = {'sku', *values}
+    try:
+        product.clean_fields(exclude=[
+            field.name for field in product_model._meta.concrete_fields if field.name not in checked
+        ])
+    except ValidationError as exc:
+        raise RowError('; '.join(
+            f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items()
+        ))
+    return product, tuple(values)
+
+
+class ImportStats:
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+        self.upserted = 0
+        self.errors = 0
+        self.batches = 0
+        self.brands_created = 0
+        self.categories_created = 0
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+    def summary(self):
+        return (
+            f'{self.rows} rows read, {self.upserted} products upserted, {self.errors} rows skipped '
+            f'in {self.elapsed:.1f}s ({self.rate:,.0f} rows/s, {self.batches} batches)'
+        )
+
+
+def import_products(rows, batch_size=IMPORT_BATCH_SIZE, create_missing=True, stdout=None, stderr=None):
+    """Upsert products by SKU from (line_number, row) pairs in batches.
+
+    Only one batch is held in memory at a time. Each batch is written in its
+    own transaction with one INSERT ... ON CONFLICT (sku) DO UPDATE per set of
+    columns its rows fill, so an interrupted import keeps the batches already
+    written and can simply be re-run. Existing products only get the columns
+    a row fills; their slug and created_at are never changed.
+    Returns an ImportStats.
+    """
+    from .models import Product, Brand, Category
+
+    brands = NameLookup(Brand, create_missing)
+    categories = NameLookup(Category, create_missing)
+    stats = ImportStats()
+    checked = False
+    batch = {}
+
+    def flush():
+        with transaction.atomic():
+            # A row whose SKU matches a stored one apart from punctuation or
+            # case updates that product, under the SKU it is stored with.
+            stored = dict(
+                Product.objects.filter(sku_normalized__in=list(batch)).values_list('sku_normalized', 'sku')
+            )
+            groups = {}
+            for number, (product, fields) in batch.items():
+                if number in stored:
+                    product.sku = stored[number]
+                groups.setdefault(fields, []).append(product)
+            for fields, products in groups.items():
+                Product.objects.bulk_create(
+                    products, update_conflicts=True, unique_fields=['sku'],
+                    update_fields=[*fields, 'brand', 'category', 'updated_at'],
+                )
+        stats.upserted += len(batch)
+        stats.batches += 1
+        batch.clear()
+
+    for line_number, row in rows:
+        stats.rows += 1
+        if not checked and isinstance(row, dict):
+            # The first row carries the header of a CSV file.
+            missing = [column for column in REQUIRED_COLUMNS if column not in row]
+            if missing:
+                raise ValueError(f"Missing required columns: {', '.join(missing)}")
+            checked = True
+        try:
+            product, fields = build_product(Product, row, brands, categories)
+        except RowError as exc:
+            stats.errors += 1
+            if stderr and stats.errors <= MAX_REPORTED_ERRORS:
+                stderr.write(f'Line {line_number}: {exc}')
+            continue
+
+        # A statement cannot upsert the same SKU twice, so the last row wins.
+        # SKUs differing only in punctuation or case count as the same one.
+        batch[normalize_part_number(product.sku) or product.sku] = (product, fields)
+        if len(batch) >= batch_size:
+            flush()
+        if stdout and stats.rows % PROGRESS_EVERY == 0:
+            stdout.write(f'{stats.rows} rows, {stats.rate:,.0f} rows/s')
+
+    if batch:
+        flush()
+    stats.brands_created = brands.created
+    stats.categories_created = categories.created
+    return stats
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.autocomplete import AutocompleteIndex
+
+
+class Command(BaseCommand):
+    help = 'Builds the in-memory autocomplete index and reports its size per worker'
+
+    def handle(self, *args, **kwargs):
+        index = AutocompleteIndex(settings.AUTOCOMPLETE_MAX_BYTES)
+        index.build()
+        stats = index.stats()
+
+        self.stdout.write(f"Entries: {stats['entries']}")
+        self.stdout.write(f"Keys: {stats['keys']}")
+        self.stdout.write(f"Memory: {stats['bytes'] / 1024 / 1024:.2f} MiB of {stats['max_bytes'] / 1024 / 1024:.2f} MiB")
+        if stats['truncated']:
+            self.stdout.write(self.style.WARNING(
+                'Index truncated at AUTOCOMPLETE_MAX_BYTES; suggestions will fall back to the database.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Index fits within the memory cap.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from products.recommendations import update_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Updates "frequently bought together" recommendations from orders placed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Discard the stored co-purchase counts and recount every order')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Counting co-purchases...')
+        orders = update_recommendations(rebuild=options['rebuild'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Processed {orders} new orders'))
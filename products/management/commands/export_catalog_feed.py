@@ -0,0 +1,48 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.feeds import FEED_FORMATS, feed_chunks, feed_path, gzip_chunks, write_feed
+
+
+class Command(BaseCommand):
+    help = 'Writes catalog export feeds (CSV, JSON Lines, merchant XML), rebuilding only when the catalog changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FEED_FORMATS), action='append', dest='formats',
+                            help='Feed format; repeat for several (default: all)')
+        parser.add_argument('--base-url', default=settings.CATALOG_FEED_BASE_URL,
+                            help='Site URL used for product and image links (default: CATALOG_FEED_BASE_URL)')
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild feeds even if the catalog has not changed')
+        parser.add_argument('--output',
+                            help='Write one feed to this path ("-" for stdout, gzipped if it ends in .gz) '
+                                 'instead of refreshing the stored feeds')
+
+    def handle(self, *args, **options):
+        formats = options['formats'] or list(FEED_FORMATS)
+        base_url = options['base_url'].rstrip('/')
+
+        if options['output']:
+            self.export_to(options['output'], formats[0], base_url)
+            return
+
+        for feed_format in formats:
+            if write_feed(feed_format, base_url, force=options['force']):
+                self.stdout.write(self.style.SUCCESS(f'Wrote {feed_path(feed_format)}'))
+            else:
+                self.stdout.write(f'{feed_path(feed_format)} is up to date')
+
+    def export_to(self, path, feed_format, base_url):
+        chunks = feed_chunks(feed_format, base_url)
+        if path == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            return
+        if path.endswith('.gz'):
+            chunks = gzip_chunks(chunks)
+        with open(path, 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {feed_format} feed to {path}'))
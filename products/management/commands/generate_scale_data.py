@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from products import scale_data
+from products.models import Product, Category, Brand, ProductReview
+from products.ratings import reconcile_ratings
+from products.versioning import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = 'Generates a production-sized data set (products, users, reviews, carts, orders) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000, help='Products to generate (default: 100000)')
+        parser.add_argument('--users', type=int, default=20000, help='Customers to generate (default: 20000)')
+        parser.add_argument('--reviews', type=int, default=50000, help='Review draws (default: 50000)')
+        parser.add_argument('--carts', type=int, default=5000, help='Open carts to generate (default: 5000)')
+        parser.add_argument('--orders', type=int, default=200000, help='Orders to generate (default: 200000)')
+        parser.add_argument('--days', type=int, default=730, help='Days of order history (default: 730)')
+        parser.add_argument('--end-date', type=date.fromisoformat, default=date.today(),
+                            help='Last day of the generated history, YYYY-MM-DD (default: today)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--workers', type=int, default=1, help='Parallel worker processes (default: 1)')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['workers'] < 1:
+            raise CommandError('--days and --workers must be at least 1')
+        if Product.objects.filter(sku__startswith='GEN-').exists():
+            raise CommandError('Generated data already exists; run this against an empty database.')
+
+        self.workers = options['workers']
+        self.context = {
+            'seed': options['seed'],
+            'days': options['days'],
+            'start_date': options['end_date'] - timedelta(days=options['days'] - 1),
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f"Generating data with seed {options['seed']} and {self.workers} worker(s)..."
+        ))
+        started = time.monotonic()
+
+        self.create_brands_and_categories()
+        self.run_phase('products', scale_data.generate_products, options['products'])
+        self.run_phase('users', scale_data.generate_users, options['users'])
+        if not Product.objects.filter(is_active=True).exists():
+            raise CommandError('There are no active products to generate reviews, carts and orders for.')
+        if options['reviews'] and not get_user_model().objects.filter(is_staff=False).exists():
+            self.stdout.write(self.style.WARNING('No customers to write reviews; skipping reviews.'))
+            options['reviews'] = 0
+        # The remaining phases draw from the popularity-ranked products and users
+        self.run_phase('reviews', scale_data.generate_reviews, options['reviews'], load=True)
+        self.run_phase('carts', scale_data.generate_carts, options['carts'], load=True)
+        self.run_phase('orders', scale_data.generate_orders, options['orders'], load=True)
+
+        self.stdout.write('Reconciling product ratings...')
+        reconcile_ratings(Product, ProductReview)
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Data generation completed in {time.monotonic() - started:.0f}s'))
+        self.stdout.write('Run build_recommendations to derive co-purchase recommendations from the orders.')
+
+    def create_brands_and_categories(self):
+        for name in scale_data.BRAND_NAMES:
+            Brand.objects.get_or_create(name=name)
+        for name in scale_data.CATEGORY_NAMES:
+            Category.objects.get_or_create(name=name)
+
+    def run_phase(self, label, func, total, load=False):
+        """Generate `total` rows in chunks, in this process or on a worker pool."""
+        if total <= 0:
+            return
+        tasks = scale_data.chunks(total)
+        started = time.monotonic()
+        written = 0
+
+        if self.workers > 1:
+            # Workers open their own connections; ours must not be inherited.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=scale_data.init_worker, initargs=(self.context, load)
+            ) as pool:
+                futures = [pool.submit(func, *task) for task in tasks]
+                for future in as_completed(futures):
+                    written += future.result()
+        else:
+            scale_data.init_worker(self.context, load)
+            for task in tasks:
+                written += func(*task)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {written} {label} in {elapsed:.1f}s ({written / elapsed if elapsed else 0:,.0f}/s)'
+        ))
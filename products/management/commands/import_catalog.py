@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importing import (
+    IMPORT_BATCH_SIZE, REQUIRED_COLUMNS, guess_format, import_products, open_catalog_file, read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Streams products from a CSV or JSON Lines file and upserts them by SKU'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON Lines file, optionally gzipped (.gz)')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='File format (default: guessed from the extension)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help=f'Products upserted per statement (default: {IMPORT_BATCH_SIZE})')
+        parser.add_argument('--no-create', action='store_false', dest='create_missing',
+                            help='Skip rows with unknown brands or categories instead of creating them')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        self.stdout.write(f"Importing {file_format} catalog from {path} (requires {', '.join(REQUIRED_COLUMNS)})...")
+
+        try:
+            with open_catalog_file(path) as stream:
+                stats = import_products(
+                    read_rows(stream, file_format),
+                    batch_size=options['batch_size'],
+                    create_missing=options['create_missing'],
+                    stdout=self.stdout,
+                    stderr=self.stderr,
+                )
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if stats.brands_created or stats.categories_created:
+            self.stdout.write(
+                f'Created {stats.brands_created} brands and {stats.categories_created} categories'
+            )
+        self.stdout.write(self.style.SUCCESS(stats.summary()))
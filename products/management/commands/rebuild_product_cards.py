@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from products.cards import refresh_product_cards
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the ProductCard read model used by product listings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products',
+                            help='Only rebuild the card of this product id (can be repeated)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding product cards...')
+        written = refresh_product_cards(options['products'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} product cards'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from products.cards import refresh_product_cards
+from products.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the stored full-text search vector for every product'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding product search vectors...')
+        updated = update_search_vectors()
+        # Product cards keep a copy of the vector for read-model searches
+        refresh_product_cards()
+        self.stdout.write(self.style.SUCCESS(f'Updated search vectors for {updated} products'))
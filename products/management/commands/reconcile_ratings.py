@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product, ProductReview
+from products.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored rating aggregates of products from their approved reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products',
+                            help='Only reconcile this product id (can be repeated)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconciling product ratings...')
+        updated = reconcile_ratings(Product, ProductReview, product_ids=options['products'])
+        self.stdout.write(self.style.SUCCESS(f'Fixed rating aggregates for {updated} products'))
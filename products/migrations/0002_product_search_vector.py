@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:49
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def populate_search_vectors(apps, schema_editor):
+    from products.search import update_search_vectors
+
+    update_search_vectors()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['product', 'is_primary'], name='products_pr_product_1b7905_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', 'is_approved'], name='products_pr_product_160d92_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['is_approved', 'created_at'], name='products_pr_is_appr_d06a3f_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_fitments(apps, schema_editor):
+    from products.fitment import build_fitments, known_models_by_make
+
+    Product = apps.get_model('products', 'Product')
+    VehicleMake = apps.get_model('products', 'VehicleMake')
+    VehicleModel = apps.get_model('products', 'VehicleModel')
+    ProductFitment = apps.get_model('products', 'ProductFitment')
+
+    known_models = known_models_by_make(VehicleModel)
+    products = Product.objects.exclude(compatible_makes='').only(
+        'pk', 'compatible_makes', 'compatible_models', 'year_from', 'year_to'
+    )
+    batch = []
+    for product in products.iterator(chunk_size=1000):
+        batch.extend(build_fitments(product, VehicleMake, VehicleModel, ProductFitment, known_models))
+        if len(batch) >= 1000:
+            ProductFitment.objects.bulk_create(batch)
+            batch = []
+    ProductFitment.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_trigram_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleMake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VehicleModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100)),
+                ('make', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='models', to='products.vehiclemake')),
+            ],
+            options={
+                'ordering': ['make__name', 'name'],
+                'unique_together': {('make', 'slug')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductFitment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year_from', models.PositiveIntegerField(blank=True, null=True)),
+                ('year_to', models.PositiveIntegerField(blank=True, null=True)),
+                ('make', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fitments', to='products.vehiclemake')),
+                ('model', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fitments', to='products.vehiclemodel')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fitments', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['make', 'model', 'year_from', 'year_to'], name='products_pr_make_id_40a29f_idx')],
+                'unique_together': {('product', 'make', 'model')},
+            },
+        ),
+        migrations.RunPython(backfill_fitments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_primary_images(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    first_image = ProductImage.objects.filter(product=models.OuterRef('pk')).order_by(
+        '-is_primary', 'order', 'id'
+    ).values('pk')[:1]
+    Product.objects.update(primary_image=models.Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.productimage'),
+        ),
+        migrations.RunPython(backfill_primary_images, migrations.RunPython.noop),
+    ]
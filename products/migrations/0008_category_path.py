@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:05
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    from products.categories import build_path, path_depth
+
+    Category = apps.get_model('products', 'Category')
+    children = {}
+    for pk, parent_id in Category.objects.values_list('pk', 'parent_id'):
+        children.setdefault(parent_id, []).append(pk)
+
+    stack = [(pk, None) for pk in children.get(None, [])]
+    while stack:
+        pk, parent_path = stack.pop()
+        path = build_path(parent_path, pk)
+        Category.objects.filter(pk=pk).update(path=path, depth=path_depth(path))
+        stack.extend((child, path) for child in children.get(pk, []))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
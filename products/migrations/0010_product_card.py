@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_product_cards(apps, schema_editor):
+    from products.cards import build_cards
+
+    build_cards(apps.get_model('products', 'Product'), apps.get_model('products', 'ProductCard'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCard',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=200)),
+                ('description', models.CharField(blank=True, max_length=200)),
+                ('short_description', models.CharField(blank=True, max_length=500)),
+                ('condition', models.CharField(max_length=20)),
+                ('brand_id', models.BigIntegerField()),
+                ('brand_name', models.CharField(max_length=100)),
+                ('brand_slug', models.SlugField(max_length=100)),
+                ('category_id', models.BigIntegerField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('category_slug', models.SlugField(max_length=100)),
+                ('image', models.ImageField(blank=True, upload_to='')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('effective_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_on_sale', models.BooleanField(default=False)),
+                ('discount_percentage', models.PositiveSmallIntegerField(default=0)),
+                ('stock_quantity', models.PositiveIntegerField(default=0)),
+                ('in_stock', models.BooleanField(default=True)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_average', models.DecimalField(decimal_places=2, default=0, max_digits=3)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['category_id'], name='products_pr_categor_ae7898_idx'), models.Index(fields=['brand_id'], name='products_pr_brand_i_7603d2_idx'), models.Index(fields=['is_featured', 'created_at'], name='products_pr_is_feat_81d9f0_idx'), django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='card_search_vector_idx'), models.Index(fields=['created_at', 'product'], name='card_created_idx'), models.Index(fields=['price', 'product'], name='card_price_idx'), models.Index(fields=['name', 'product'], name='card_name_idx'), models.Index(fields=['rating_average', 'product'], name='card_rating_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_product_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:33
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def backfill_specs(apps, schema_editor):
+    from products.cards import build_cards
+    from products.specs import build_specs
+
+    Product = apps.get_model('products', 'Product')
+    build_specs(Product, apps.get_model('products', 'ProductAttributeValue'))
+    build_cards(Product, apps.get_model('products', 'ProductCard'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_product_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='specs',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productcard',
+            name='specs',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['specs'], name='product_specs_idx', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='productcard',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['specs'], name='card_specs_idx', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.RunPython(backfill_specs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_sku_normalized(apps, schema_editor):
+    from products.part_numbers import normalize_part_number
+
+    Product = apps.get_model('products', 'Product')
+    # SKUs that only differ in punctuation or case keep the first product's
+    # normalized value; the others stay empty until their SKU is corrected.
+    taken = set()
+    batch = []
+    for product in Product.objects.order_by('pk').only('pk', 'sku').iterator(chunk_size=2000):
+        number = normalize_part_number(product.sku)
+        if not number or number in taken:
+            continue
+        taken.add(number)
+        product.sku_normalized = number
+        batch.append(product)
+        if len(batch) >= 2000:
+            Product.objects.bulk_update(batch, ['sku_normalized'])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['sku_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_specs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku_normalized',
+            field=models.CharField(editable=False, max_length=100, null=True),
+        ),
+        migrations.RunPython(backfill_sku_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='sku_normalized',
+            field=models.CharField(editable=False, max_length=100, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='ProductPartNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('oem', 'OEM'), ('cross_reference', 'Cross-reference')], default='oem', max_length=20)),
+                ('manufacturer', models.CharField(blank=True, max_length=100)),
+                ('number', models.CharField(max_length=100)),
+                ('number_normalized', models.CharField(editable=False, max_length=100)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='part_numbers', to='products.product')),
+            ],
+            options={
+                'ordering': ['kind', 'number'],
+                'unique_together': {('number_normalized', 'product')},
+            },
+        ),
+    ]
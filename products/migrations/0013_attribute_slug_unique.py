@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+
+def dedupe_attribute_slugs(apps, schema_editor):
+    """Give every attribute but the oldest of a slug its own slug, and rebuild the affected specs."""
+    from products.cards import build_cards
+    from products.specs import build_specs
+
+    ProductAttribute = apps.get_model('products', 'ProductAttribute')
+    ProductAttributeValue = apps.get_model('products', 'ProductAttributeValue')
+    seen = set()
+    renamed = []
+    for attribute in ProductAttribute.objects.order_by('pk'):
+        if attribute.slug in seen:
+            attribute.slug = f'{attribute.slug[:90]}-{attribute.pk}'
+            attribute.save(update_fields=['slug'])
+            renamed.append(attribute.pk)
+        seen.add(attribute.slug)
+    if renamed:
+        product_ids = set(
+            ProductAttributeValue.objects.filter(attribute_id__in=renamed).values_list('product_id', flat=True)
+        )
+        Product = apps.get_model('products', 'Product')
+        build_specs(Product, ProductAttributeValue, product_ids)
+        build_cards(Product, apps.get_model('products', 'ProductCard'), product_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_part_numbers'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_attribute_slugs, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='productattribute',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='productattribute',
+            name='slug',
+            field=models.SlugField(max_length=100, unique=True),
+        ),
+    ]
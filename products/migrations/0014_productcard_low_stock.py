@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:04
+
+from django.db import migrations, models
+
+
+def backfill_low_stock(apps, schema_editor):
+    from products.cards import build_cards
+
+    build_cards(apps.get_model('products', 'Product'), apps.get_model('products', 'ProductCard'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_attribute_slug_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcard',
+            name='low_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_low_stock, migrations.RunPython.noop),
+    ]
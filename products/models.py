@@ -1,5 +1,12 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.conf import settings
+from django.db import models, transaction
+from django.core.exceptions import ValidationError
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Substr
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -15,17 +22,51 @@ class Category(models.Model):
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subcategories')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Materialized path of ancestor ids ('/3/17/'), see products.categories
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    
     class Meta:
         verbose_name_plural = 'Categories'
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['name'], name='category_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.name
     
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+            if self.parent_id == self.pk or f'/{self.pk}/' in parent_path:
+                raise ValidationError({'parent': 'A category cannot be moved under itself or one of its subcategories.'})
+    
     def save(self, *args, **kwargs):
+        from .categories import build_path, path_depth
+        
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        # One transaction, so the tree cache invalidated on commit by the
+        # post_save receivers is rebuilt from the new paths.
+        with transaction.atomic(using=kwargs.get('using')):
+            old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first() if self.pk else None
+            super().save(*args, **kwargs)
+            
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() if self.parent_id else None
+            path = build_path(parent_path, self.pk)
+            if path == old_path:
+                return
+            depth = path_depth(path)
+            Category.objects.filter(pk=self.pk).update(path=path, depth=depth)
+            if old_path:
+                # Moved: re-root every descendant under the new path
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (depth - path_depth(old_path)),
+                )
+        self.path, self.depth = path, depth
     
     def get_absolute_url(self):
         return reverse('products:category_detail', kwargs={'slug': self.slug})
@@ -43,6 +84,9 @@ class Brand(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['name'], name='brand_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.name
@@ -53,6 +97,143 @@ class Brand(models.Model):
         super().save(*args, **kwargs)
 
 
+# Relations rendered by product cards (listings, cart, wishlist, orders).
+PRODUCT_CARD_RELATED = ('brand', 'primary_image')
+
+
+def product_card_related(prefix=None):
+    """select_related() lookups for product cards, optionally behind a relation.
+    
+    e.g. cart.items.select_related(*product_card_related('product'))
+    """
+    if prefix:
+        return [f'{prefix}__{field}' for field in PRODUCT_CARD_RELATED]
+    return list(PRODUCT_CARD_RELATED)
+
+
+class ProductQuerySet(models.QuerySet):
+    """Product queryset that keeps derived catalog data current on bulk writes.
+    
+    Queryset updates and bulk operations do not send model signals, so the
+    normalized SKU is set and the stored search vector, fitment rows, product
+    cards and catalog version are refreshed here, and the caching proxy is
+    purged of the pages showing the changed products.
+    """
+    
+    def _touches_derived_fields(self, fields):
+        from .cards import touches_card_fields
+        from .fitment import touches_fitment_fields
+        from .search import touches_search_fields
+        
+        return touches_search_fields(fields) or touches_fitment_fields(fields) or touches_card_fields(fields)
+    
+    def _refresh_derived(self, product_ids, fields=None):
+        from .cards import touches_card_fields, refresh_product_cards
+        from .fitment import touches_fitment_fields, sync_product_fitments
+        from .search import touches_search_fields, update_search_vectors
+        
+        product_ids = list(product_ids)
+        if fields is None or touches_search_fields(fields):
+            update_search_vectors(product_ids)
+        if fields is None or touches_fitment_fields(fields):
+            sync_product_fitments(self.model.objects.filter(pk__in=product_ids))
+        # Cards copy the search vector, so they are refreshed last.
+        if fields is None or touches_search_fields(fields) or touches_card_fields(fields):
+            refresh_product_cards(product_ids)
+    
+    def _listing_keys(self, products):
+        """Surrogate keys of the category and brand listings the given products appear on."""
+        from shop.cdn import brand_products_key, category_products_key
+        from .categories import get_category_node, path_ids
+        
+        if not settings.CDN_PURGE_URL:
+            return set()
+        keys = set()
+        for category_id, brand_id in products.order_by().values_list('category_id', 'brand_id').distinct():
+            # Products are listed under their category and every ancestor
+            node = get_category_node(category_id)
+            keys.update(category_products_key(pk) for pk in (path_ids(node['path']) if node else [category_id]))
+            keys.add(brand_products_key(brand_id))
+        return keys
+    
+    def _catalog_changed(self, product_ids=None, listing_keys=()):
+        from shop.cdn import purge, product_key, CATALOG_KEY, PRODUCT_LIST_KEY
+        from .versioning import bump_catalog_version
+        
+        transaction.on_commit(bump_catalog_version, using=self.db)
+        if product_ids is None:
+            purge(CATALOG_KEY)
+        else:
+            purge(PRODUCT_LIST_KEY, *listing_keys, *(product_key(pk) for pk in product_ids))
+    
+    def _moves_products(self, fields):
+        return any(field in ('category', 'category_id', 'brand', 'brand_id') for field in fields)
+    
+    def _normalize_skus(self, objs):
+        from .part_numbers import normalize_part_number
+        
+        for obj in objs:
+            obj.sku_normalized = normalize_part_number(obj.sku) or None
+    
+    def update(self, **kwargs):
+        from .part_numbers import normalize_part_number
+        
+        if isinstance(kwargs.get('sku'), str):
+            kwargs.setdefault('sku_normalized', normalize_part_number(kwargs['sku']) or None)
+        product_ids = list(self.values_list('pk', flat=True))
+        listing_keys = self._listing_keys(self)
+        rows = super().update(**kwargs)
+        if self._touches_derived_fields(kwargs):
+            self._refresh_derived(product_ids, kwargs)
+        if self._moves_products(kwargs):
+            listing_keys |= self._listing_keys(self.model.objects.filter(pk__in=product_ids))
+        self._catalog_changed(product_ids, listing_keys)
+        return rows
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self._normalize_skus(objs)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        product_ids = [obj.pk for obj in objs if obj.pk]
+        unique_fields = kwargs.get('unique_fields') or ()
+        if kwargs.get('update_conflicts') and len(unique_fields) == 1 and len(product_ids) < len(objs):
+            # Upserts do not return primary keys, so look them up by the conflict key
+            field = self.model._meta.get_field(unique_fields[0]).attname
+            product_ids = self.model.objects.filter(
+                **{f'{field}__in': [getattr(obj, field) for obj in objs]}
+            ).values_list('pk', flat=True)
+        self._refresh_derived(product_ids)
+        # New products can appear on any listing
+        self._catalog_changed()
+        return objs
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if 'sku' in fields:
+            self._normalize_skus(objs)
+            fields = [*fields, 'sku_normalized']
+        product_ids = [obj.pk for obj in objs]
+        products = self.model.objects.filter(pk__in=product_ids)
+        listing_keys = self._listing_keys(products) if self._moves_products(fields) else set()
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if self._touches_derived_fields(fields):
+            self._refresh_derived(product_ids, fields)
+        listing_keys |= self._listing_keys(products)
+        self._catalog_changed(product_ids, listing_keys)
+        return rows
+    
+    def for_cards(self):
+        """Join what product cards render instead of prefetching every image."""
+        return self.select_related(*product_card_related())
+    
+    def refresh_primary_images(self):
+        """Point primary_image at each product's flagged (or first) image."""
+        first_image = ProductImage.objects.filter(product=OuterRef('pk')).order_by(
+            '-is_primary', 'order', 'id'
+        ).values('pk')[:1]
+        return self.update(primary_image=Subquery(first_image))
+
+
 class Product(models.Model):
     """Main product model for car parts."""
     
@@ -65,6 +246,8 @@ class Product(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     sku = models.CharField(max_length=100, unique=True)
+    # Letters and digits of the SKU, uppercased, for exact part-number lookups
+    sku_normalized = models.CharField(max_length=100, unique=True, null=True, editable=False)
     description = models.TextField()
     short_description = models.CharField(max_length=500, blank=True)
     
@@ -99,25 +282,103 @@ class Product(models.Model):
     meta_title = models.CharField(max_length=200, blank=True)
     meta_description = models.CharField(max_length=300, blank=True)
     
+    # Ratings (denormalized from approved reviews, see products.ratings)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    # Cached reference to the image product cards show, see ProductImage.save
+    primary_image = models.ForeignKey(
+        'ProductImage', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', editable=False
+    )
+    
+    # Search
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # {attribute slug: value} document built from the attribute values, see products.specs
+    specs = models.JSONField(default=dict, blank=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['brand', 'is_active']),
             models.Index(fields=['is_featured', 'is_active']),
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            GinIndex(fields=['name'], name='product_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['specs'], name='product_specs_idx', opclasses=['jsonb_path_ops']),
+            # Keyset pagination orderings (see products.pagination)
+            models.Index(fields=['is_active', 'created_at', 'id'], name='product_active_created_idx'),
+            models.Index(fields=['is_active', 'price', 'id'], name='product_active_price_idx'),
+            models.Index(fields=['is_active', 'name', 'id'], name='product_active_name_idx'),
+            models.Index(fields=['is_active', 'rating_average', 'id'], name='product_active_rating_idx'),
         ]
     
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def _changed_fields(self):
+        """Names of the fields changed since the product was loaded, or None for a new one."""
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return None
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (field.attname not in loaded or self.__dict__[field.attname] != loaded[field.attname])
+        }
+    
+    def _sku_changed(self):
+        # Products whose SKU collided with another one when sku_normalized was
+        # introduced keep it empty, so it is only recomputed for a new SKU.
+        changed = self._changed_fields()
+        return changed is None or 'sku' in changed
+    
+    def clean(self):
+        from .part_numbers import normalize_part_number
+        
+        super().clean()
+        number = normalize_part_number(self.sku)
+        if number and self._sku_changed() and Product.objects.filter(sku_normalized=number).exclude(pk=self.pk).exists():
+            raise ValidationError({'sku': 'Another product has this SKU apart from punctuation or case.'})
+    
     def save(self, *args, **kwargs):
+        from .part_numbers import normalize_part_number
+        
         if not self.slug:
             self.slug = slugify(f"{self.name}-{self.sku}")
+        update_fields = kwargs.get('update_fields')
+        if self._sku_changed():
+            self.sku_normalized = normalize_part_number(self.sku) or None
+            if update_fields is not None and 'sku' in update_fields:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'sku_normalized'}
+        # The post_save receivers only rebuild fitments, search vectors and
+        # cards when the fields they are derived from were saved.
+        self._saved_fields = set(update_fields) if update_fields is not None else self._changed_fields()
         super().save(*args, **kwargs)
+        saved = self._meta.concrete_fields if update_fields is None else [self._meta.get_field(name) for name in update_fields]
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{field.attname: self.__dict__[field.attname] for field in saved if field.attname in self.__dict__},
+        }
     
     def get_absolute_url(self):
         return reverse('products:product_detail', kwargs={'slug': self.slug})
@@ -143,19 +404,28 @@ class Product(models.Model):
     def is_in_stock(self):
         """Check if product is in stock."""
         return not self.manage_stock or self.stock_quantity > 0
+    
+    @property
+    def is_low_stock(self):
+        """Check if a managed product is down to its low stock threshold."""
+        return self.manage_stock and 0 < self.stock_quantity <= self.low_stock_threshold
 
     @property
     def average_rating(self):
-        """Calculate average product rating."""
-        reviews = self.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return round(sum(review.rating for review in reviews) / reviews.count(), 1)
+        """Average rating of approved reviews, from the stored aggregates."""
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 1)
         return 0
 
     @property
     def review_count(self):
-        """Get total number of approved reviews."""
-        return self.reviews.filter(is_approved=True).count()
+        """Number of approved reviews, from the stored aggregates."""
+        return self.rating_count
+    
+    @property
+    def rating_distribution(self):
+        """Approved review counts per star, e.g. {5: 12, 4: 3, ...}."""
+        return {star: getattr(self, f'rating_{star}_count') for star in range(1, 6)}
     
 
 
@@ -182,17 +452,24 @@ class ProductImage(models.Model):
             # Ensure only one primary image per product
             ProductImage.objects.filter(product=self.product, is_primary=True).update(is_primary=False)
         super().save(*args, **kwargs)
+        Product.objects.filter(pk=self.product_id).refresh_primary_images()
+    
+    def delete(self, *args, **kwargs):
+        product_id = self.product_id
+        result = super().delete(*args, **kwargs)
+        Product.objects.filter(pk=product_id).refresh_primary_images()
+        return result
 
 
 class ProductAttribute(models.Model):
     """Product attributes like color, size, material, etc."""
     
     name = models.CharField(max_length=100)
-    slug = models.SlugField(max_length=100)
+    # Keys the attribute in product specs documents and ?attr.<slug> filters
+    slug = models.SlugField(max_length=100, unique=True)
     
     class Meta:
         ordering = ['name']
-        unique_together = ['name', 'slug']
     
     def __str__(self):
         return self.name
@@ -217,6 +494,35 @@ class ProductAttributeValue(models.Model):
         return f"{self.product.name} - {self.attribute.name}: {self.value}"
 
 
+class ProductPartNumber(models.Model):
+    """OEM and cross-reference part numbers a product can be found by."""
+    
+    KIND_CHOICES = [
+        ('oem', 'OEM'),
+        ('cross_reference', 'Cross-reference'),
+    ]
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='part_numbers')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='oem')
+    manufacturer = models.CharField(max_length=100, blank=True)
+    number = models.CharField(max_length=100)
+    # Letters and digits only, uppercased; the unique index also serves lookups by number
+    number_normalized = models.CharField(max_length=100, editable=False)
+    
+    class Meta:
+        ordering = ['kind', 'number']
+        unique_together = ['number_normalized', 'product']
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.get_kind_display()} {self.number}"
+    
+    def save(self, *args, **kwargs):
+        from .part_numbers import normalize_part_number
+        
+        self.number_normalized = normalize_part_number(self.number)
+        super().save(*args, **kwargs)
+
+
 class ProductReview(models.Model):
     """Product reviews and ratings."""
     
@@ -246,4 +552,220 @@ class ProductReview(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.product.name} - {self.rating} stars by {self.user.username}"
\ No newline at end of file
+        return f"{self.product.name} - {self.rating} stars by {self.user.username}"
+
+
+class VehicleMake(models.Model):
+    """Vehicle manufacturers used for parts fitment."""
+    
+    name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=100, unique=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name)
+        super().save(*args, **kwargs)
+
+
+class VehicleModel(models.Model):
+    """Vehicle models belonging to a make."""
+    
+    make = models.ForeignKey(VehicleMake, on_delete=models.CASCADE, related_name='models')
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100)
+    
+    class Meta:
+        ordering = ['make__name', 'name']
+        unique_together = ['make', 'slug']
+    
+    def __str__(self):
+        return f"{self.make.name} {self.name}"
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name)
+        super().save(*args, **kwargs)
+
+
+class ProductFitment(models.Model):
+    """Normalized vehicle compatibility for a product.
+    
+    A missing model means the part fits every model of the make; missing
+    years mean the range is open on that side.
+    """
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='fitments')
+    make = models.ForeignKey(VehicleMake, on_delete=models.CASCADE, related_name='fitments')
+    model = models.ForeignKey(VehicleModel, on_delete=models.CASCADE, null=True, blank=True, related_name='fitments')
+    year_from = models.PositiveIntegerField(null=True, blank=True)
+    year_to = models.PositiveIntegerField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ['product', 'make', 'model']
+        indexes = [
+            models.Index(fields=['make', 'model', 'year_from', 'year_to']),
+        ]
+    
+    def __str__(self):
+        vehicle = self.model or self.make
+        return f"{self.product.name} - {vehicle} ({self.year_from or '...'}-{self.year_to or '...'})"
+
+
+class ProductCoPurchase(models.Model):
+    """Sparse co-purchase matrix: number of orders containing both products.
+    
+    Stored in both directions so a product's row set can be read from the
+    (product, related) index. Maintained by products.recommendations.
+    """
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['product', 'related']
+    
+    def __str__(self):
+        return f"{self.product_id} + {self.related_id}: {self.count}"
+
+
+class ProductRecommendation(models.Model):
+    """Top co-purchased products for a product ("frequently bought together")."""
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommended_with')
+    score = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ['product', 'rank']
+        unique_together = ['product', 'rank']
+    
+    def __str__(self):
+        return f"{self.product.name} -> {self.related.name} (#{self.rank})"
+
+
+class CoPurchaseBatch(models.Model):
+    """One run of the co-purchase job; the latest run's last_order_id is the watermark."""
+    
+    last_order_id = models.PositiveBigIntegerField()
+    orders = models.PositiveIntegerField(default=0)
+    pairs = models.PositiveIntegerField(default=0)
+    products_updated = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Co-purchase batch up to order {self.last_order_id}"
+
+
+class ProductCard(models.Model):
+    """Flat read model with exactly what a product card renders.
+    
+    One row per active product, kept current by products.cards from the
+    catalog change signals. Listings read it without joins when
+    CATALOG_READ_MODEL is enabled.
+    """
+    
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=200)
+    description = models.CharField(max_length=200, blank=True)
+    short_description = models.CharField(max_length=500, blank=True)
+    condition = models.CharField(max_length=20)
+    
+    brand_id = models.BigIntegerField()
+    brand_name = models.CharField(max_length=100)
+    brand_slug = models.SlugField(max_length=100)
+    category_id = models.BigIntegerField()
+    category_name = models.CharField(max_length=100)
+    category_slug = models.SlugField(max_length=100)
+    image = models.ImageField(blank=True)
+    
+    # Prices and stock, precomputed from the product's properties
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2)
+    is_on_sale = models.BooleanField(default=False)
+    discount_percentage = models.PositiveSmallIntegerField(default=0)
+    stock_quantity = models.PositiveIntegerField(default=0)
+    in_stock = models.BooleanField(default=True)
+    low_stock = models.BooleanField(default=False)
+    
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    
+    is_featured = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    search_vector = SearchVectorField(null=True)
+    specs = models.JSONField(default=dict)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category_id']),
+            models.Index(fields=['brand_id']),
+            models.Index(fields=['is_featured', 'created_at']),
+            GinIndex(fields=['search_vector'], name='card_search_vector_idx'),
+            GinIndex(fields=['specs'], name='card_specs_idx', opclasses=['jsonb_path_ops']),
+            # Keyset pagination orderings (see products.pagination)
+            models.Index(fields=['created_at', 'product'], name='card_created_idx'),
+            models.Index(fields=['price', 'product'], name='card_price_idx'),
+            models.Index(fields=['name', 'product'], name='card_name_idx'),
+            models.Index(fields=['rating_average', 'product'], name='card_rating_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    def get_absolute_url(self):
+        return reverse('products:product_detail', kwargs={'slug': self.slug})
+    
+    # The properties below give cards the same template interface as Product.
+    
+    @property
+    def id(self):
+        return self.product_id
+    
+    @cached_property
+    def brand(self):
+        return Brand(pk=self.brand_id, name=self.brand_name, slug=self.brand_slug)
+    
+    @cached_property
+    def category(self):
+        return Category(pk=self.category_id, name=self.category_name, slug=self.category_slug)
+    
+    @property
+    def primary_image(self):
+        # Cards stand in for their own primary image, so `primary_image.image` works.
+        return self if self.image else None
+    
+    @property
+    def get_price(self):
+        return self.effective_price
+    
+    @property
+    def is_in_stock(self):
+        return self.in_stock
+    
+    @property
+    def is_low_stock(self):
+        return self.low_stock
+    
+    @property
+    def average_rating(self):
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 1)
+        return 0
+    
+    @property
+    def review_count(self):
+        return self.rating_count
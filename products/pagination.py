@@ -0,0 +1,261 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator, Page
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .counting import get_result_count
+
+
+# Pages up to this number keep OFFSET pagination with numbered links; past
+# it the "next" link switches to a cursor so deep pages never OFFSET-scan.
+NUMBERED_PAGES = 5
+CURSOR_PARAM = 'cursor'
+
+# Keyset orderings for each supported sort. `pk` breaks ties so the key is
+# unique (it is the product id on both Product and ProductCard); each one is
+# backed by an (is_active, field, id) index on Product and a (field, product)
+# index on ProductCard.
+SORT_ORDERINGS = {
+    '-created_at': ('-created_at', '-pk'),
+    'created_at': ('created_at', 'pk'),
+    'price': ('price', 'pk'),
+    '-price': ('-price', '-pk'),
+    'name': ('name', 'pk'),
+    '-name': ('-name', '-pk'),
+    '-rating': ('-rating_average', '-pk'),
+    'relevance': ('-search_rank', '-pk'),
+}
+DEFAULT_SORT = '-created_at'
+
+
+def get_ordering(sort):
+    return SORT_ORDERINGS.get(sort, SORT_ORDERINGS[DEFAULT_SORT])
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps datetimes to the microsecond; DjangoJSONEncoder cuts them to milliseconds.
+
+    A rounded boundary would skip or repeat rows that share its millisecond,
+    as bulk-created and imported products do. The ISO string is parsed back
+    by the field's lookup.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(ordering, values, direction):
+    payload = {'o': ordering[0], 'v': values, 'd': direction}
+    payload = json.dumps(payload, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, ordering):
+    """Return (values, direction), or None for a malformed cursor or one from another sort."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload['v'], payload['d']
+        if payload['o'] != ordering[0]:
+            return None
+    except (ValueError, TypeError, KeyError):
+        return None
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    return values, direction
+
+
+def _reverse(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def _after(ordering, values):
+    """Q for rows strictly after `values` in `ordering`."""
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        op = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{op}': value})
+        equal &= Q(**{name: value})
+    # The leading bound lets the database range-scan the composite index.
+    first = ordering[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    return bound & condition
+
+
+def _key(obj, ordering):
+    return [getattr(obj, field.lstrip('-')) for field in ordering]
+
+
+def _query(params, **updates):
+    params = params.copy()
+    for name in ('page', CURSOR_PARAM, 'csrfmiddlewaretoken'):
+        params.pop(name, None)
+    for name, value in updates.items():
+        params[name] = value
+    return params.urlencode()
+
+
+class NumberedPage(Page):
+    """Regular OFFSET page that links to a cursor once past the numbered pages."""
+
+    is_keyset = False
+
+    def setup_links(self, params, ordering):
+        first = max(1, self.number - 2)
+        last = min(self.paginator.num_pages, NUMBERED_PAGES, self.number + 2)
+        self.page_links = [(num, _query(params, page=num)) for num in range(first, last + 1)]
+        self.previous_query = _query(params, page=self.number - 1) if self.has_previous() else ''
+        self.next_query = ''
+        if self.has_next():
+            if self.number < NUMBERED_PAGES:
+                self.next_query = _query(params, page=self.number + 1)
+            else:
+                cursor = encode_cursor(ordering, _key(self[len(self) - 1], ordering), 'next')
+                self.next_query = _query(params, **{CURSOR_PARAM: cursor})
+
+
+class CatalogPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        # Cached per filter set; very large sets use the planner's estimate,
+        # which is plenty for the handful of numbered page links we render.
+        return get_result_count(self.object_list)
+
+    def _get_page(self, *args, **kwargs):
+        return NumberedPage(*args, **kwargs)
+
+
+class KeysetPage:
+    """A page fetched with a keyset (cursor) condition instead of OFFSET."""
+
+    is_keyset = True
+    number = None
+    paginator = None
+
+    def __init__(self, object_list, has_next, has_previous, params, ordering):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.page_links = [(1, _query(params))]
+        self.previous_query = ''
+        self.next_query = ''
+        if object_list and has_previous:
+            cursor = encode_cursor(ordering, _key(object_list[0], ordering), 'prev')
+            self.previous_query = _query(params, **{CURSOR_PARAM: cursor})
+        if object_list and has_next:
+            cursor = encode_cursor(ordering, _key(object_list[-1], ordering), 'next')
+            self.next_query = _query(params, **{CURSOR_PARAM: cursor})
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+def keyset_page(queryset, ordering, cursor, per_page, params):
+    values, direction = cursor
+    if direction == 'prev':
+        rows = list(queryset.filter(_after(_reverse(ordering), values)).order_by(*_reverse(ordering))[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(rows, has_next=True, has_previous=has_more, params=params, ordering=ordering)
+
+    rows = list(queryset.filter(_after(ordering, values)).order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    return KeysetPage(rows[:per_page], has_next=has_more, has_previous=True, params=params, ordering=ordering)
+
+
+class IdListPage(Page):
+    """Page over a list of ids whose rows are loaded for this page only."""
+
+    is_keyset = False
+
+    def setup_links(self, params):
+        # Offsets into a list are free, so every page gets a numbered link.
+        first = max(1, self.number - 2)
+        last = min(self.paginator.num_pages, self.number + 2)
+        self.page_links = [(num, _query(params, page=num)) for num in range(first, last + 1)]
+        self.previous_query = _query(params, page=self.number - 1) if self.has_previous() else ''
+        self.next_query = _query(params, page=self.number + 1) if self.has_next() else ''
+
+
+class IdListPaginator(Paginator):
+
+    def _get_page(self, *args, **kwargs):
+        return IdListPage(*args, **kwargs)
+
+
+def paginate_list(request, items, per_page):
+    """Paginate rows that are already loaded (e.g. exact part-number matches)."""
+    page = IdListPaginator(items, per_page).get_page(request.GET.get('page'))
+    page.setup_links(request.GET)
+    return page
+
+
+def paginate_ids(request, ids, queryset, per_page):
+    """Paginate an ordered id list (e.g. cached search results), loading only the page's rows."""
+    page = IdListPaginator(ids, per_page).get_page(request.GET.get('page'))
+    rows = queryset.in_bulk(page.object_list)
+    page.object_list = [rows[pk] for pk in page.object_list if pk in rows]
+    page.setup_links(request.GET)
+    return page
+
+
+def _page_number(params):
+    """The requested numbered page; pages past NUMBERED_PAGES are only reachable by cursor."""
+    try:
+        number = int(params.get('page') or 1)
+    except (TypeError, ValueError):
+        return 1
+    if number > NUMBERED_PAGES:
+        # Refused rather than served, as a deep OFFSET scan is what the cursor avoids
+        raise Http404('Later pages are reached through the next page link.')
+    return number
+
+
+def paginate(request, queryset, sort, per_page):
+    """Paginate a product queryset, numbered for the first pages and by cursor after.
+
+    Returns a NumberedPage or KeysetPage; both expose `page_links`,
+    `previous_query` and `next_query` for the pagination template.
+    """
+    ordering = get_ordering(sort)
+    params = request.GET
+
+    cursor = params.get(CURSOR_PARAM)
+    cursor = decode_cursor(cursor, ordering) if cursor else None
+    if cursor:
+        try:
+            return keyset_page(queryset, ordering, cursor, per_page, params)
+        except (ValidationError, ValueError, TypeError):
+            # Tampered or stale cursor values; start over from the first page.
+            pass
+
+    paginator = CatalogPaginator(queryset.order_by(*ordering), per_page)
+    page = paginator.get_page(_page_number(params))
+    page.setup_links(params, ordering)
+    return page
@@ -0,0 +1,56 @@
+import re
+
+from django.db.models import Q
+
+
+# Normalized part numbers outside this length are not looked up
+PART_NUMBER_MIN_LENGTH = 4
+PART_NUMBER_MAX_LENGTH = 40
+
+PART_NUMBER_RESULT_LIMIT = 100
+
+_SEPARATORS = re.compile(r'[\W_]+')
+# Letters, digits, whitespace and the separators part numbers are written with
+_PART_NUMBER_CHARS = re.compile(r'^[\w\s./-]+$')
+
+
+def normalize_part_number(value):
+    """Letters and digits only, uppercased: "0 986-494.104" becomes "0986494104"."""
+    return _SEPARATORS.sub('', value or '').upper()
+
+
+def looks_like_part_number(query):
+    """Whether a search query reads as a part number rather than as words.
+
+    Every space-separated piece has to contain a digit or be at most three
+    characters long, so "0 986 494 104" and "W 712/75" qualify while
+    "brake pads 2015" does not.
+    """
+    query = query.strip()
+    if not _PART_NUMBER_CHARS.match(query):
+        return False
+    number = normalize_part_number(query)
+    if not PART_NUMBER_MIN_LENGTH <= len(number) <= PART_NUMBER_MAX_LENGTH:
+        return False
+    if not any(char.isdigit() for char in number):
+        return False
+    return all(any(char.isdigit() for char in piece) or len(piece) <= 3 for piece in query.split())
+
+
+def part_number_filter(query):
+    """Match products whose SKU or any OEM/cross-reference number equals the query.
+
+    Both halves of the union are exact lookups on unique B-tree indexes.
+    """
+    from .models import Product, ProductPartNumber
+
+    number = normalize_part_number(query)
+    matches = Product.objects.filter(sku_normalized=number).order_by().values('pk').union(
+        ProductPartNumber.objects.filter(number_normalized=number).order_by().values('product_id')
+    )
+    return Q(pk__in=matches)
+
+
+def find_by_part_number(queryset, query, limit=PART_NUMBER_RESULT_LIMIT):
+    """Products (or cards) of the queryset matching a part number, loaded in one query."""
+    return list(queryset.filter(part_number_filter(query)).order_by('name', 'pk')[:limit])
@@ -0,0 +1,101 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+STARS = (1, 2, 3, 4, 5)
+
+# Denormalized rating columns on Product, derived from approved reviews.
+RATING_FIELDS = (
+    'rating_sum', 'rating_count', 'rating_average',
+    'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+)
+
+
+def star_field(rating):
+    return f'rating_{rating}_count'
+
+
+def average_rating(rating_sum, rating_count):
+    """Average as stored in Product.rating_average (two decimals, half up)."""
+    if not rating_count:
+        return Decimal('0.00')
+    return (Decimal(rating_sum) / rating_count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def _average_expression(rating_sum, rating_count):
+    return Coalesce(
+        Cast(rating_sum, DecimalField(max_digits=12, decimal_places=2)) / NullIf(rating_count, Value(0)),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+
+
+def apply_review_delta(product_id, rating, delta):
+    """Add (delta=1) or remove (delta=-1) one approved review from a product's aggregates.
+
+    Runs as a single UPDATE with F() expressions, so concurrent reviews
+    never overwrite each other's counts.
+    """
+    from .models import Product
+
+    rating_sum = F('rating_sum') + rating * delta
+    rating_count = F('rating_count') + delta
+    Product.objects.filter(pk=product_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating_average=_average_expression(rating_sum, rating_count),
+        **{star_field(rating): F(star_field(rating)) + delta},
+    )
+
+
+def rating_aggregates(review_model, product_ids=None):
+    """Compute {product_id: {field: value}} from approved reviews in one grouped query."""
+    reviews = review_model.objects.filter(is_approved=True)
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+    rows = reviews.values('product_id').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{star_field(star): Count('id', filter=Q(rating=star)) for star in STARS},
+    ).order_by()
+
+    aggregates = {}
+    for row in rows:
+        product_id = row.pop('product_id')
+        row['rating_average'] = average_rating(row['rating_sum'], row['rating_count'])
+        aggregates[product_id] = row
+    return aggregates
+
+
+def reconcile_ratings(product_model, review_model, product_ids=None, batch_size=1000):
+    """Recompute stored rating aggregates and fix products that drifted.
+
+    Returns the number of products that were updated.
+    """
+    aggregates = rating_aggregates(review_model, product_ids)
+    empty = dict.fromkeys(RATING_FIELDS, 0)
+    empty['rating_average'] = Decimal('0.00')
+
+    products = product_model.objects.only('pk', *RATING_FIELDS).order_by('pk')
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    stale = []
+    updated = 0
+    for product in products.iterator(chunk_size=batch_size):
+        expected = aggregates.get(product.pk, empty)
+        if all(getattr(product, field) == expected[field] for field in RATING_FIELDS):
+            continue
+        for field in RATING_FIELDS:
+            setattr(product, field, expected[field])
+        stale.append(product)
+        if len(stale) >= batch_size:
+            product_model.objects.bulk_update(stale, RATING_FIELDS)
+            updated += len(stale)
+            stale = []
+    if stale:
+        product_model.objects.bulk_update(stale, RATING_FIELDS)
+        updated += len(stale)
+    return updated
@@ -0,0 +1,154 @@
+from collections import Counter
+from datetime import timedelta
+from itertools import combinations, groupby
+
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .versioning import bump_version, RECOMMENDATIONS_NAMESPACE
+
+
+# Neighbours kept per product; more than the detail page shows so inactive
+# products can be skipped at read time.
+TOP_K = 8
+# Orders read per chunk while counting pairs.
+ORDER_CHUNK_SIZE = 2000
+# Baskets larger than this (bulk/B2B orders) add quadratic noise and are skipped.
+MAX_BASKET_SIZE = 50
+# Orders that never completed do not count as purchases.
+EXCLUDED_ORDER_STATUSES = ('cancelled', 'refunded')
+UPSERT_BATCH_SIZE = 1000
+# The watermark is an order id, and ids are assigned before the placing
+# transaction commits. Only orders at least this old are folded in, so no
+# order with a lower id can still be on its way.
+ORDER_SETTLE_DELAY = timedelta(minutes=15)
+
+
+def get_watermark():
+    """Id of the last order already folded into the co-purchase counts."""
+    from .models import CoPurchaseBatch
+
+    return CoPurchaseBatch.objects.order_by('-last_order_id').values_list('last_order_id', flat=True).first() or 0
+
+
+def count_pairs(rows):
+    """Count product pairs per basket from (order_id, product_id) rows sorted by order."""
+    pairs = Counter()
+    for order_id, items in groupby(rows, key=lambda row: row[0]):
+        basket = sorted({product_id for _, product_id in items})
+        if 1 < len(basket) <= MAX_BASKET_SIZE:
+            pairs.update(combinations(basket, 2))
+    return pairs
+
+
+def _upsert_pairs(pairs):
+    """Add pair counts to the stored matrix in both directions."""
+    from .models import ProductCoPurchase
+
+    table = ProductCoPurchase._meta.db_table
+    rows = []
+    for (a, b), count in pairs.items():
+        rows.append((a, b, count))
+        rows.append((b, a, count))
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            values = ', '.join(['(%s, %s, %s)'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} (product_id, related_id, count) VALUES {values} "
+                f"ON CONFLICT (product_id, related_id) DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                [value for row in batch for value in row],
+            )
+
+
+def rebuild_top_neighbours(product_ids):
+    """Rewrite the top-K recommendation rows of the given products from the matrix."""
+    from .models import ProductCoPurchase, ProductRecommendation
+
+    product_ids = list(product_ids)
+    ranked = ProductCoPurchase.objects.filter(product_id__in=product_ids).annotate(
+        rank=Window(RowNumber(), partition_by=F('product_id'), order_by=[F('count').desc(), F('related_id')])
+    ).filter(rank__lte=TOP_K).values_list('product_id', 'related_id', 'count', 'rank')
+
+    recommendations = [
+        ProductRecommendation(product_id=product_id, related_id=related_id, score=count, rank=rank)
+        for product_id, related_id, count, rank in ranked
+    ]
+    with transaction.atomic():
+        ProductRecommendation.objects.filter(product_id__in=product_ids).delete()
+        ProductRecommendation.objects.bulk_create(recommendations)
+
+
+def update_recommendations(rebuild=False, stdout=None):
+    """Fold orders placed since the last run into the matrix and refresh affected top-K rows.
+
+    Orders younger than ORDER_SETTLE_DELAY are left for the next run. Each
+    chunk's counts are committed together with its CoPurchaseBatch row, so an
+    interrupted run resumes from the last committed chunk without counting
+    any order twice. Returns the number of orders processed.
+    """
+    from checkout.models import OrderItem
+    from .models import CoPurchaseBatch, ProductCoPurchase, ProductRecommendation
+
+    if rebuild:
+        with transaction.atomic():
+            ProductRecommendation.objects.all().delete()
+            ProductCoPurchase.objects.all().delete()
+            CoPurchaseBatch.objects.all().delete()
+
+    items = OrderItem.objects.exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+    start = get_watermark()
+    settled = items.filter(order_id__gt=start, order__created_at__lte=timezone.now() - ORDER_SETTLE_DELAY)
+    last_order_id = settled.order_by('-order_id').values_list('order_id', flat=True).first()
+    if last_order_id is None:
+        if rebuild:
+            bump_version(RECOMMENDATIONS_NAMESPACE)
+        return 0
+
+    affected = set()
+    orders = 0
+    while start < last_order_id:
+        # Chunks start at the next counted order, so gaps in the ids and runs
+        # of excluded orders cost neither queries nor batch rows.
+        first_order_id = items.filter(order_id__gt=start).order_by('order_id').values_list('order_id', flat=True).first()
+        if first_order_id is None or first_order_id > last_order_id:
+            break
+        start = first_order_id - 1
+        end = min(start + ORDER_CHUNK_SIZE, last_order_id)
+        rows = list(
+            items.filter(order_id__gt=start, order_id__lte=end).order_by('order_id').values_list('order_id', 'product_id')
+        )
+        if not rows:
+            start = end
+            continue
+        pairs = count_pairs(rows)
+        chunk_products = {product_id for pair in pairs for product_id in pair}
+        chunk_orders = len({order_id for order_id, _ in rows})
+        with transaction.atomic():
+            _upsert_pairs(pairs)
+            CoPurchaseBatch.objects.create(
+                last_order_id=end, orders=chunk_orders, pairs=len(pairs), products_updated=len(chunk_products)
+            )
+        affected |= chunk_products
+        orders += chunk_orders
+        if stdout:
+            stdout.write(f'Orders {start + 1}-{end}: {chunk_orders} orders, {len(pairs)} pairs')
+        start = end
+
+    affected = sorted(affected)
+    for index in range(0, len(affected), UPSERT_BATCH_SIZE):
+        rebuild_top_neighbours(affected[index:index + UPSERT_BATCH_SIZE])
+    bump_version(RECOMMENDATIONS_NAMESPACE)
+    return orders
+
+
+def get_frequently_bought_together(product, limit=4):
+    """Active products most often bought with `product`, best first (one indexed query)."""
+    from .models import Product
+
+    return Product.objects.filter(
+        is_active=True, recommended_with__product=product
+    ).for_cards().order_by('recommended_with__rank')[:limit]
@@ -0,0 +1,379 @@
+"""Synthetic catalog, customer and order data for load testing.
+
+Rows are generated in fixed-size chunks, each with its own seeded random
+generator, so the output depends only on the seed and the requested sizes
+(up to database ids), not on how many worker processes produced it. Run it against an empty
+database (see the generate_scale_data command).
+"""
+import random
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import connections
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+CHUNK_SIZE = 5000
+
+# Popularity follows a Zipf-like power law: the product (or customer) at
+# popularity rank r gets weight 1 / r**s.
+PRODUCT_POPULARITY_EXPONENT = 1.1
+CUSTOMER_ACTIVITY_EXPONENT = 0.8
+
+# Relative order volume by month (holiday peak) and weekday (quieter weekends),
+# on top of a steady growth trend over the generated history.
+MONTH_WEIGHTS = (0.9, 0.85, 1.0, 1.05, 1.1, 1.05, 1.0, 1.0, 0.95, 1.0, 1.35, 1.5)
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 1.05, 0.8, 0.75)
+GROWTH = 0.6
+
+GUEST_ORDER_SHARE = 0.2
+BASKET_CONTINUE = 0.45  # chance of adding another line, so baskets are mostly 1-3 lines
+ORDER_STATUSES = (
+    ('delivered', 70), ('shipped', 10), ('processing', 5),
+    ('pending', 5), ('cancelled', 7), ('refunded', 3),
+)
+RATING_WEIGHTS = (5, 5, 10, 30, 50)
+ANONYMOUS_CART_SHARE = 0.4
+TAX_RATE = Decimal('0.08')
+SHIPPING_COST = Decimal('9.99')
+FREE_SHIPPING_OVER = Decimal('100.00')
+
+PART_NAMES = (
+    'Air Filter', 'Oil Filter', 'Timing Belt', 'Spark Plug Set', 'Fuel Pump', 'Brake Pads',
+    'Brake Rotor', 'Brake Caliper', 'Shock Absorber', 'Strut Assembly', 'Tie Rod End',
+    'Control Arm', 'Wheel Hub', 'Headlight Bulb', 'Alternator', 'Battery', 'Ignition Coil',
+    'Floor Mat Set', 'Side Mirror', 'Radiator', 'Water Pump', 'Clutch Kit', 'Wiper Blades',
+    'Exhaust Muffler', 'Oxygen Sensor', 'Cabin Filter', 'Drive Belt', 'Thermostat',
+)
+PART_QUALIFIERS = ('Premium', 'Heavy-Duty', 'OEM', 'Performance', 'Economy', 'Sport', 'Ceramic', 'Pro')
+VEHICLE_MAKES = {
+    'BMW': ('3 Series', '5 Series', 'X3', 'X5'),
+    'Audi': ('A3', 'A4', 'A6', 'Q5'),
+    'Toyota': ('Corolla', 'Camry', 'RAV4', 'Hilux'),
+    'Ford': ('Focus', 'Fiesta', 'F-150', 'Transit'),
+    'Mercedes-Benz': ('C-Class', 'E-Class', 'GLC', 'Sprinter'),
+    'Volkswagen': ('Golf', 'Passat', 'Tiguan', 'Polo'),
+}
+BRAND_NAMES = (
+    'Bosch', 'Brembo', 'Mann', 'NGK', 'Denso', 'Valeo', 'Continental', 'Mahle', 'Febi',
+    'Sachs', 'Bilstein', 'Hella', 'Lemforder', 'TRW', 'Gates', 'SKF', 'Delphi', 'Castrol',
+)
+CATEGORY_NAMES = (
+    'Engine Parts', 'Brake Systems', 'Suspension & Steering', 'Wheels & Tires',
+    'Lighting & Electrical', 'Interior Accessories', 'Exterior Accessories',
+    'Fluids & Chemicals', 'Tools & Equipment', 'Performance Parts',
+)
+FIRST_NAMES = ('Alex', 'Sam', 'Nino', 'Giorgi', 'Maria', 'John', 'Ana', 'Luis', 'Emma', 'Levan', 'Sofia', 'David')
+LAST_NAMES = ('Smith', 'Garcia', 'Beridze', 'Kapanadze', 'Brown', 'Lopez', 'Miller', 'Jones', 'Davis', 'Lomidze')
+CITIES = (('Tbilisi', 'TB'), ('Batumi', 'AJ'), ('Madrid', 'MD'), ('Austin', 'TX'), ('Denver', 'CO'), ('Seattle', 'WA'))
+REVIEW_TITLES = {
+    1: 'Did not fit', 2: 'Disappointing', 3: 'Does the job', 4: 'Good value', 5: 'Excellent part',
+}
+
+# The hash of an unusable password (see AbstractBaseUser.set_unusable_password).
+UNUSABLE_PASSWORD = '!generated'
+
+
+def chunk_rng(seed, kind, index):
+    return random.Random(f'{seed}:{kind}:{index}')
+
+
+def chunks(total, size=CHUNK_SIZE):
+    """(index, start, stop) ranges covering `total` rows."""
+    return [(index, start, min(start + size, total)) for index, start in enumerate(range(0, total, size))]
+
+
+def zipf_weights(count, exponent):
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def pick(rng, items, cum_weights):
+    # random.choices with cum_weights, without building a one-element list
+    return items[bisect_left(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def day_weights(start, days):
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        weights.append(
+            MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] * (1 + GROWTH * offset / days)
+        )
+    return list(accumulate(weights))
+
+
+def random_moment(rng, start, cum_days):
+    """A timestamp on a seasonally weighted day, at a random time of day."""
+    offset = bisect_left(cum_days, rng.random() * cum_days[-1])
+    day = start + timedelta(days=offset)
+    moment = datetime.combine(day, time()) + timedelta(seconds=rng.randrange(86400))
+    return timezone.make_aware(moment)
+
+
+@contextmanager
+def keep_timestamps(*models):
+    """Let bulk_create store generated created_at values instead of now()."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Context:
+    """Per-process lookup data for the generators, loaded once per phase."""
+
+    def __init__(self, options):
+        self.options = options
+        self.seed = options['seed']
+        self.start = options['start_date']
+        self.cum_days = day_weights(self.start, options['days'])
+        self.products = array('q')
+        self.users = array('q')
+
+    def load(self):
+        from accounts.models import User
+        from .models import Product
+
+        # Popularity rank is a seeded shuffle, identical in every worker. Rows are
+        # ordered by natural key because parallel inserts interleave the ids.
+        products = list(Product.objects.filter(is_active=True).order_by('sku').values_list('pk', flat=True))
+        random.Random(f'{self.seed}:popularity').shuffle(products)
+        self.products = array('q', products)
+        self.product_weights = zipf_weights(len(products), PRODUCT_POPULARITY_EXPONENT)
+
+        users = list(User.objects.filter(is_staff=False).order_by('username').values_list('pk', flat=True))
+        random.Random(f'{self.seed}:activity').shuffle(users)
+        self.users = array('q', users)
+        self.user_weights = zipf_weights(len(users), CUSTOMER_ACTIVITY_EXPONENT)
+
+    def popular_product(self, rng):
+        return pick(rng, self.products, self.product_weights)
+
+    def active_user(self, rng):
+        return pick(rng, self.users, self.user_weights)
+
+
+_context = None
+
+
+def init_worker(options, load):
+    """Process pool initializer: fresh database connections and lookup data."""
+    global _context
+    import django
+
+    django.setup()
+    # Connections inherited through fork must not be shared with the parent.
+    connections.close_all()
+    _context = Context(options)
+    if load:
+        _context.load()
+
+
+def generate_products(index, start, stop):
+    from .models import Product, Brand, Category
+
+    ctx = _context
+    rng = chunk_rng(ctx.seed, 'products', index)
+    brands = list(Brand.objects.order_by('pk').values_list('pk', 'name'))
+    categories = list(Category.objects.order_by('pk').values_list('pk', flat=True))
+    makes = sorted(VEHICLE_MAKES)
+
+    products = []
+    for number in range(start, stop):
+        brand_id, brand_name = rng.choice(brands)
+        part = rng.choice(PART_NAMES)
+        name = f'{brand_name} {rng.choice(PART_QUALIFIERS)} {part}'
+        # Log-normal prices: most parts are cheap, a long tail is expensive.
+        price = Decimal(str(round(min(max(rng.lognormvariate(4.0, 0.9), 2), 5000), 2)))
+        fit_makes = rng.sample(makes, rng.choice((1, 1, 2, 3)))
+        fit_models = [f'{make} {model}' for make in fit_makes for model in rng.sample(VEHICLE_MAKES[make], 2)]
+        year_from = rng.randint(1995, 2018)
+        sku = f'GEN-{number:09d}'
+        products.append(Product(
+            name=name,
+            slug=slugify(f'{name}-{sku}'),
+            sku=sku,
+            description=f'{name} for {", ".join(fit_makes)}. Meets or exceeds OEM specifications.',
+            short_description=f'{part} by {brand_name}',
+            brand_id=brand_id,
+            category_id=rng.choice(categories),
+            price=price,
+            sale_price=(price * Decimal('0.85')).quantize(Decimal('0.01')) if rng.random() < 0.15 else None,
+            stock_quantity=rng.choice((0, 0, 2, 5, 10, 25, 50, 100, 250)),
+            condition=rng.choices(('new', 'used', 'refurbished'), (85, 5, 10))[0],
+            compatible_makes=', '.join(fit_makes),
+            compatible_models=', '.join(fit_models),
+            year_from=year_from,
+            year_to=rng.choice((None, year_from + rng.randint(3, 12))),
+            is_featured=rng.random() < 0.02,
+        ))
+    Product.objects.bulk_create(products)
+    return len(products)
+
+
+def generate_users(index, start, stop):
+    from accounts.models import User
+
+    ctx = _context
+    rng = chunk_rng(ctx.seed, 'users', index)
+    users = []
+    for number in range(start, stop):
+        joined = random_moment(rng, ctx.start, ctx.cum_days)
+        users.append(User(
+            username=f'user{number}',
+            email=f'user{number}@example.com',
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            password=UNUSABLE_PASSWORD,
+            date_joined=joined,
+            created_at=joined,
+        ))
+    with keep_timestamps(User):
+        User.objects.bulk_create(users)
+    return len(users)
+
+
+def generate_reviews(index, start, stop):
+    from .models import ProductReview
+
+    ctx = _context
+    rng = chunk_rng(ctx.seed, 'reviews', index)
+    reviews = {}
+    for _ in range(start, stop):
+        # Popular products collect most reviews, from the most active customers.
+        key = (ctx.popular_product(rng), ctx.active_user(rng))
+        rating = rng.choices(range(1, 6), RATING_WEIGHTS)[0]
+        reviews[key] = ProductReview(
+            product_id=key[0],
+            user_id=key[1],
+            rating=rating,
+            title=REVIEW_TITLES[rating],
+            review=f'{REVIEW_TITLES[rating]}. Rated {rating} out of 5.',
+            is_approved=rng.random() < 0.95,
+            is_verified_purchase=rng.random() < 0.7,
+            created_at=random_moment(rng, ctx.start, ctx.cum_days),
+        )
+    with keep_timestamps(ProductReview):
+        # A customer reviews a product once; repeated draws are dropped.
+        ProductReview.objects.bulk_create(reviews.values(), ignore_conflicts=True)
+    return len(reviews)
+
+
+def generate_carts(index, start, stop):
+    from cart.models import Cart, CartItem
+
+    ctx = _context
+    rng = chunk_rng(ctx.seed, 'carts', index)
+    carts = []
+    for number in range(start, stop):
+        # Registered carts belong to distinct users (one cart per user).
+        user_cart = number < len(ctx.users) and rng.random() >= ANONYMOUS_CART_SHARE
+        carts.append(Cart(
+            user_id=ctx.users[number] if user_cart else None,
+            session_key=None if user_cart else f'gen{ctx.seed}x{number}'[:40],
+        ))
+    carts = Cart.objects.bulk_create(carts)
+
+    items = []
+    for cart in carts:
+        lines = {ctx.popular_product(rng) for _ in range(rng.choice((1, 1, 2, 3, 5)))}
+        items.extend(CartItem(cart=cart, product_id=pk, quantity=rng.choice((1, 1, 1, 2, 4))) for pk in lines)
+    CartItem.objects.bulk_create(items)
+    return len(carts)
+
+
+def _address(rng):
+    city, state = rng.choice(CITIES)
+    return {
+        'street_address': f'{rng.randint(1, 999)} {rng.choice(LAST_NAMES)} Street',
+        'city': city,
+        'state': state,
+        'postal_code': f'{rng.randint(10000, 99999)}',
+    }
+
+
+def generate_orders(index, start, stop):
+    from checkout.models import Order, OrderItem
+    from .models import Product
+
+    ctx = _context
+    rng = chunk_rng(ctx.seed, 'orders', index)
+    statuses, status_weights = zip(*ORDER_STATUSES)
+
+    baskets = []
+    for _ in range(start, stop):
+        lines = {ctx.popular_product(rng)}
+        while rng.random() < BASKET_CONTINUE and len(lines) < 10:
+            lines.add(ctx.popular_product(rng))
+        baskets.append(lines)
+
+    needed = set().union(*baskets)
+    snapshots = {
+        row[0]: row[1:] for row in Product.objects.filter(pk__in=needed).values_list(
+            'pk', 'name', 'sku', 'brand__name', 'price', 'sale_price'
+        )
+    }
+
+    orders = []
+    lines_by_order = []
+    for number, lines in zip(range(start, stop), baskets):
+        guest = not ctx.users or rng.random() < GUEST_ORDER_SHARE
+        user_id = None if guest else ctx.active_user(rng)
+        created = random_moment(rng, ctx.start, ctx.cum_days)
+        status = rng.choices(statuses, status_weights)[0]
+
+        order_lines = []
+        for pk in lines:
+            name, sku, brand, price, sale_price = snapshots[pk]
+            unit_price = sale_price or price
+            quantity = rng.choice((1, 1, 1, 2, 2, 4))
+            order_lines.append(OrderItem(
+                product_id=pk, quantity=quantity, unit_price=unit_price, total_price=unit_price * quantity,
+                product_name=name, product_sku=sku, product_brand=brand, created_at=created,
+            ))
+        subtotal = sum(line.total_price for line in order_lines)
+        shipping = Decimal('0.00') if subtotal >= FREE_SHIPPING_OVER else SHIPPING_COST
+        tax = (subtotal * TAX_RATE).quantize(Decimal('0.01'))
+        address = _address(rng)
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+        orders.append(Order(
+            order_number=f'GEN-{ctx.seed}-{number:010d}',
+            user_id=user_id,
+            status=status,
+            payment_status='refunded' if status == 'refunded' else ('pending' if status == 'pending' else 'paid'),
+            payment_method=rng.choice(('credit_card', 'credit_card', 'paypal', 'cash_on_delivery')),
+            email=f'user{user_id}@example.com' if user_id else f'guest{number}@example.com',
+            first_name=first_name,
+            last_name=last_name,
+            **{f'shipping_{field}': value for field, value in address.items()},
+            **{f'billing_{field}': value for field, value in address.items()},
+            subtotal=subtotal,
+            shipping_cost=shipping,
+            tax_amount=tax,
+            total_amount=subtotal + shipping + tax,
+            created_at=created,
+            shipped_at=created + timedelta(days=rng.randint(1, 3)) if status in ('shipped', 'delivered') else None,
+            delivered_at=created + timedelta(days=rng.randint(4, 9)) if status == 'delivered' else None,
+        ))
+        lines_by_order.append(order_lines)
+
+    with keep_timestamps(Order, OrderItem):
+        orders = Order.objects.bulk_create(orders)
+        items = []
+        for order, order_lines in zip(orders, lines_by_order):
+            for line in order_lines:
+                line.order = order
+                items.append(line)
+        OrderItem.objects.bulk_create(items)
+    return len(orders)
+
@@ -0,0 +1,239 @@
+import hashlib
+import unicodedata
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramSimilarity, TrigramWordSimilarity,
+)
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils.translation import get_language
+
+from .counting import ResultCount
+from .part_numbers import find_by_part_number, looks_like_part_number
+from .versioning import get_catalog_version
+
+
+# PostgreSQL text search configuration used for each site language.
+# There is no built-in Georgian dictionary, so Georgian falls back to 'simple'.
+SEARCH_CONFIGS = {
+    'en': 'english',
+    'es': 'spanish',
+    'ka': 'simple',
+}
+DEFAULT_SEARCH_CONFIG = 'simple'
+
+# Typeahead settings
+SUGGESTION_MIN_LENGTH = 2
+SUGGESTION_MAX_LENGTH = 100
+SUGGESTION_PRODUCT_LIMIT = 5
+SUGGESTION_CATEGORY_LIMIT = 3
+SUGGESTION_CACHE_TIMEOUT = 60  # seconds
+
+# Search result cache: the ordered ids of up to SEARCH_RESULT_LIMIT matches
+# per normalized query, language and catalog version.
+SEARCH_QUERY_MAX_LENGTH = 200
+SEARCH_RESULT_LIMIT = 1000
+SEARCH_RESULT_CACHE_TIMEOUT = 60 * 30
+
+# Fields that feed the stored search vector. Saving a product that touches
+# any of them has to refresh the vector.
+SEARCH_FIELDS = (
+    'name', 'sku', 'description', 'short_description',
+    'brand', 'brand_id', 'category', 'category_id',
+    'compatible_makes', 'compatible_models',
+)
+
+
+def touches_search_fields(fields):
+    """Check whether a set of updated field names affects the search vector."""
+    return any(field in SEARCH_FIELDS for field in fields)
+
+
+def get_search_config(language=None):
+    """Return the text search configuration for a language code."""
+    language = (language or get_language() or '').split('-')[0]
+    return SEARCH_CONFIGS.get(language, DEFAULT_SEARCH_CONFIG)
+
+
+def _weighted_vector_sql(config):
+    # Postgres only has four weights, so description and compatibility share D.
+    return (
+        f"setweight(to_tsvector('{config}', coalesce(p.name, '')), 'A') || "
+        f"setweight(to_tsvector('{config}', coalesce(p.sku, '')), 'B') || "
+        f"setweight(to_tsvector('{config}', coalesce(b.name, '') || ' ' || coalesce(c.name, '')), 'C') || "
+        f"setweight(to_tsvector('{config}', coalesce(p.short_description, '') || ' ' || coalesce(p.description, '')), 'D') || "
+        f"setweight(to_tsvector('{config}', coalesce(p.compatible_makes, '') || ' ' || coalesce(p.compatible_models, '')), 'D')"
+    )
+
+
+def search_vector_sql():
+    """SQL expression building the stored vector for every configured language.
+
+    Stemmed lexemes of all languages are concatenated into a single vector so
+    that a query parsed with any of the configurations can match it.
+    """
+    configs = sorted(set(SEARCH_CONFIGS.values()) | {DEFAULT_SEARCH_CONFIG})
+    return ' || '.join(_weighted_vector_sql(config) for config in configs)
+
+
+def update_search_vectors(product_ids=None):
+    """Recompute the stored search vector for the given products (or all)."""
+    sql = (
+        "UPDATE products_product AS p SET search_vector = " + search_vector_sql() + " "
+        "FROM products_brand AS b, products_category AS c "
+        "WHERE b.id = p.brand_id AND c.id = p.category_id"
+    )
+    params = []
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        sql += " AND p.id = ANY(%s)"
+        params.append(product_ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def search_products(queryset, query, language=None):
+    """Filter a Product (or ProductCard) queryset by full-text query and order it by rank."""
+    search_query = SearchQuery(query, config=get_search_config(language), search_type='websearch')
+    return queryset.filter(search_vector=search_query).annotate(
+        search_rank=SearchRank(F('search_vector'), search_query)
+    ).order_by('-search_rank', '-pk')
+
+
+def normalize_search_query(query):
+    """Unicode-normalize, casefold and collapse whitespace so equivalent queries share results.
+
+    Accents are kept: the stored vectors are not unaccented, so folding them
+    would change what a query matches.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())[:SEARCH_QUERY_MAX_LENGTH]
+
+
+def get_search_results(query):
+    """Return (ordered product ids, total count) for a search, through the cache.
+
+    At most SEARCH_RESULT_LIMIT ids are kept, and a larger result set is
+    reported as a capped count of that many.
+
+    Entries are keyed by the normalized query, the search language and the
+    catalog version, so any catalog change invalidates them.
+    """
+    from .cards import listing_queryset
+
+    query = normalize_search_query(query)
+    config = get_search_config()
+    digest = hashlib.md5(query.encode()).hexdigest()
+    key = f'search:ids:{get_catalog_version()}:{config}:{digest}'
+    cached = cache.get(key)
+    if cached is None:
+        # One id past the limit tells whether there are more
+        ids = list(search_products(listing_queryset(), query).values_list('pk', flat=True)[:SEARCH_RESULT_LIMIT + 1])
+        cached = (ids[:SEARCH_RESULT_LIMIT], len(ids) > SEARCH_RESULT_LIMIT)
+        cache.set(key, cached, SEARCH_RESULT_CACHE_TIMEOUT)
+    ids, is_capped = cached
+    return ids, ResultCount(len(ids), is_capped=is_capped)
+
+
+def normalize_suggestion_query(query):
+    """Lowercase and collapse whitespace so equivalent prefixes share a cache entry."""
+    return ' '.join(query.lower().split())[:SUGGESTION_MAX_LENGTH]
+
+
+def _trigram_match(field, query):
+    # Both operators are served by the gin_trgm_ops indexes: word similarity
+    # catches prefixes inside longer names, plain similarity catches typos.
+    return Q(**{f'{field}__trigram_word_similar': query}) | Q(**{f'{field}__trigram_similar': query})
+
+
+def _trigram_rank(field, query):
+    return Greatest(TrigramWordSimilarity(query, field), TrigramSimilarity(field, query))
+
+
+def _product_suggestion(product):
+    return {
+        'type': 'product',
+        'name': product.name,
+        'brand': product.brand.name,
+        'url': product.get_absolute_url(),
+        'price': str(product.get_price),
+    }
+
+
+def build_part_number_suggestions(query):
+    """Suggest the products whose SKU or OEM/cross-reference number is the query."""
+    from .models import Product
+
+    products = find_by_part_number(
+        Product.objects.filter(is_active=True).select_related('brand'), query, SUGGESTION_PRODUCT_LIMIT
+    )
+    return [_product_suggestion(product) for product in products]
+
+
+def build_suggestions(query):
+    """Build typeahead suggestions for an already normalized query."""
+    from .models import Product, Brand, Category
+
+    suggestions = []
+
+    brand_ids = list(
+        Brand.objects.filter(_trigram_match('name', query), is_active=True).values_list('pk', flat=True)
+    )
+    products = Product.objects.filter(
+        _trigram_match('name', query) | Q(brand_id__in=brand_ids),
+        is_active=True
+    ).select_related('brand').annotate(
+        similarity=Greatest(_trigram_rank('name', query), _trigram_rank('brand__name', query))
+    ).order_by('-similarity', 'name')[:SUGGESTION_PRODUCT_LIMIT]
+
+    for product in products:
+        suggestions.append(_product_suggestion(product))
+
+    categories = Category.objects.filter(
+        _trigram_match('name', query),
+        is_active=True
+    ).annotate(
+        similarity=_trigram_rank('name', query)
+    ).order_by('-similarity', 'name')[:SUGGESTION_CATEGORY_LIMIT]
+
+    for category in categories:
+        suggestions.append({
+            'type': 'category',
+            'name': category.name,
+            'url': category.get_absolute_url(),
+        })
+
+    return suggestions
+
+
+def get_suggestions(query):
+    """Return cached typeahead suggestions for a raw query string."""
+    from . import autocomplete
+
+    query = normalize_suggestion_query(query)
+    if len(query) < SUGGESTION_MIN_LENGTH:
+        return []
+
+    # A part number is looked up exactly, in one indexed query
+    if looks_like_part_number(query):
+        suggestions = build_part_number_suggestions(query)
+        if suggestions:
+            return suggestions
+
+    if autocomplete.is_enabled():
+        index = autocomplete.get_autocomplete_index()
+        if index.is_complete:
+            return index.suggest(query, SUGGESTION_PRODUCT_LIMIT, SUGGESTION_CATEGORY_LIMIT)
+
+    # URLs are language-prefixed, so the language is part of the key.
+    cache_key = f'search_suggestions:{get_language()}:{query}'
+    suggestions = cache.get(cache_key)
+    if suggestions is None:
+        suggestions = build_suggestions(query)
+        cache.set(cache_key, suggestions, SUGGESTION_CACHE_TIMEOUT)
+    return suggestions
@@ -0,0 +1,97 @@
+from rest_framework import serializers
+
+from .models import Product, ProductImage, ProductAttributeValue, ProductReview, Category, Brand
+
+
+# Serializers read only columns and select_related() relations, so
+# serializing a page of products costs no queries beyond the page itself.
+
+
+class BrandSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Brand
+        fields = ['id', 'name', 'slug', 'website']
+
+
+class CategorySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug', 'parent', 'depth']
+
+
+class RelatedNameSerializer(serializers.Serializer):
+    """Brand or category as embedded in a product."""
+
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    slug = serializers.CharField()
+
+
+class ProductSerializer(serializers.ModelSerializer):
+    """Product as listed; expects for_cards() (brand, primary image) and category joined."""
+
+    url = serializers.CharField(source='get_absolute_url')
+    brand = RelatedNameSerializer()
+    category = RelatedNameSerializer()
+    effective_price = serializers.DecimalField(source='get_price', max_digits=10, decimal_places=2)
+    in_stock = serializers.BooleanField(source='is_in_stock')
+    review_count = serializers.IntegerField(source='rating_count')
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'sku', 'name', 'slug', 'url', 'short_description', 'condition',
+            'brand', 'category', 'price', 'sale_price', 'effective_price', 'is_on_sale',
+            'discount_percentage', 'stock_quantity', 'in_stock', 'rating_average', 'review_count',
+            'compatible_makes', 'compatible_models', 'year_from', 'year_to',
+            'image', 'is_featured', 'created_at', 'updated_at',
+        ]
+
+    def get_image(self, product):
+        return product.primary_image.image.url if product.primary_image else None
+
+
+class ProductImageSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ProductImage
+        fields = ['image', 'alt_text', 'is_primary']
+
+
+class ProductAttributeSerializer(serializers.ModelSerializer):
+
+    name = serializers.CharField(source='attribute.name')
+    slug = serializers.CharField(source='attribute.slug')
+
+    class Meta:
+        model = ProductAttributeValue
+        fields = ['name', 'slug', 'value']
+
+
+class ProductDetailSerializer(ProductSerializer):
+    """Product with its description, images, attributes and rating breakdown."""
+
+    images = ProductImageSerializer(many=True)
+    attributes = ProductAttributeSerializer(many=True)
+    rating_distribution = serializers.DictField(child=serializers.IntegerField())
+
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + [
+            'description', 'weight', 'dimensions', 'meta_title', 'meta_description',
+            'rating_distribution', 'images', 'attributes',
+        ]
+
+
+class ProductReviewSerializer(serializers.ModelSerializer):
+
+    author = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductReview
+        fields = ['id', 'rating', 'title', 'review', 'author', 'is_verified_purchase', 'created_at']
+
+    def get_author(self, review):
+        return review.user.first_name or review.user.username
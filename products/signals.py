@@ -0,0 +1,200 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import autocomplete
+from .cards import touches_card_fields, refresh_product_cards
+from .categories import invalidate_category_tree
+from .fitment import touches_fitment_fields, sync_product_fitments
+from .ratings import apply_review_delta
+from .models import (
+    Product, Brand, Category, ProductReview, ProductImage, ProductAttribute, ProductAttributeValue,
+)
+from .search import touches_search_fields, update_search_vectors
+from .specs import sync_product_specs
+from .versioning import (
+    bump_catalog_version, bump_version, reviews_namespace, images_namespace, attributes_namespace,
+    ATTRIBUTES_NAMESPACE,
+)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(sender, instance, raw=False, **kwargs):
+    """Rebuild the stored search vector after a product is saved."""
+    if raw:
+        return
+    fields = getattr(instance, '_saved_fields', None)
+    if fields is None or touches_search_fields(fields):
+        update_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_fitments(sender, instance, raw=False, **kwargs):
+    """Keep the normalized fitment rows in step with the compatibility strings."""
+    if raw:
+        return
+    fields = getattr(instance, '_saved_fields', None)
+    if fields is None or touches_fitment_fields(fields):
+        sync_product_fitments([instance])
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+def refresh_related_search_vectors(sender, instance, created=False, raw=False, **kwargs):
+    """Brand and category names are part of the product search vector."""
+    if raw or created:
+        return
+    update_search_vectors(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_autocomplete(sender, instance, raw=False, **kwargs):
+    """Publish catalog changes to the in-memory autocomplete index once committed."""
+    if raw or not autocomplete.is_enabled():
+        return
+    kind = {
+        Product: autocomplete.PRODUCT,
+        Brand: autocomplete.BRAND,
+        Category: autocomplete.CATEGORY,
+    }[sender]
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete.record_change(kind, pk))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, raw=False, **kwargs):
+    """Invalidate catalog-wide caches (facets, counts) once the change is committed."""
+    if raw:
+        return
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def reviews_changed(sender, instance, raw=False, **kwargs):
+    """Invalidate cached review counts and review fragments for the reviewed product."""
+    if raw:
+        return
+    namespace = reviews_namespace(instance.product_id)
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_review_rating(sender, instance, raw=False, **kwargs):
+    """Keep the review's stored state so post_save can work out the rating delta."""
+    if raw or instance.pk is None:
+        instance._rated = None
+        return
+    instance._rated = ProductReview.objects.filter(pk=instance.pk, is_approved=True).values_list(
+        'product_id', 'rating'
+    ).first()
+
+
+@receiver(post_save, sender=ProductReview)
+def update_product_rating(sender, instance, raw=False, **kwargs):
+    """Apply an approved review (or its removal) to the product's rating aggregates."""
+    if raw:
+        return
+    before = getattr(instance, '_rated', None)
+    after = (instance.product_id, instance.rating) if instance.is_approved else None
+    if before == after:
+        return
+    if before:
+        apply_review_delta(*before, -1)
+    if after:
+        apply_review_delta(*after, 1)
+
+
+@receiver(post_delete, sender=ProductReview)
+def remove_product_rating(sender, instance, **kwargs):
+    """Take a deleted approved review out of the product's rating aggregates."""
+    if instance.is_approved:
+        apply_review_delta(instance.product_id, instance.rating, -1)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_tree_changed(sender, raw=False, **kwargs):
+    """Rebuild the cached category tree after categories are added, moved or removed."""
+    if raw:
+        return
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def images_changed(sender, instance, raw=False, **kwargs):
+    """Invalidate the cached gallery of the image's product."""
+    if raw:
+        return
+    namespace = images_namespace(instance.product_id)
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def attributes_changed(sender, instance, raw=False, **kwargs):
+    """Invalidate the cached specifications of the attribute value's product."""
+    if raw:
+        return
+    namespace = attributes_namespace(instance.product_id)
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+@receiver(post_save, sender=ProductAttribute)
+@receiver(post_delete, sender=ProductAttribute)
+def attribute_definitions_changed(sender, raw=False, **kwargs):
+    """Attribute names appear in every product's specifications."""
+    if raw:
+        return
+    transaction.on_commit(lambda: bump_version(ATTRIBUTES_NAMESPACE))
+
+
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def refresh_product_specs(sender, instance, raw=False, **kwargs):
+    """Keep the product's filterable specs document in step with its attribute values."""
+    if raw:
+        return
+    # Deferred, so deleting a product does not rewrite it once per attribute value
+    product_id = instance.product_id
+    transaction.on_commit(lambda: sync_product_specs([product_id]))
+
+
+@receiver(post_save, sender=ProductAttribute)
+def refresh_attribute_specs(sender, instance, created=False, raw=False, **kwargs):
+    """Attribute slugs are the keys of the specs documents of every product that has the attribute."""
+    if raw or created:
+        return
+    product_ids = list(instance.productattributevalue_set.values_list('product_id', flat=True))
+    transaction.on_commit(lambda: sync_product_specs(product_ids))
+
+
+# Registered after the search vector receivers, since cards copy the vector.
+@receiver(post_save, sender=Product)
+def refresh_product_card(sender, instance, raw=False, **kwargs):
+    """Keep the product's listing card in step with the product."""
+    if raw:
+        return
+    fields = getattr(instance, '_saved_fields', None)
+    if fields is None or touches_search_fields(fields) or touches_card_fields(fields):
+        refresh_product_cards([instance.pk])
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+def refresh_related_product_cards(sender, instance, created=False, raw=False, **kwargs):
+    """Cards carry brand and category names and slugs."""
+    if raw or created:
+        return
+    refresh_product_cards(instance.products.values_list('pk', flat=True))
@@ -0,0 +1,163 @@
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Q
+from django.urls import reverse
+from django.utils import translation
+
+from .versioning import get_catalog_version
+
+
+# The sitemap protocol allows at most 50,000 URLs per file. Every product is
+# listed once per language, so a chunk holds SITEMAP_MAX_URLS // languages
+# products, split by primary key range so chunk boundaries never move.
+SITEMAP_MAX_URLS = 50000
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+SHOP_PAGES = (
+    'shop:home', 'shop:about', 'shop:contact', 'shop:faq',
+    'shop:privacy_policy', 'shop:terms_of_service', 'shop:shipping_returns',
+)
+
+SITEMAP_STATE_CACHE_KEY = 'sitemap:state:{}'
+SITEMAP_CHUNK_CACHE_KEY = 'sitemap:products:{}:{}:{}'
+SITEMAP_PAGES_CACHE_KEY = 'sitemap:pages:{}:{}'
+
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+URLSET_CLOSE = '</urlset>\n'
+
+
+def products_per_chunk():
+    return SITEMAP_MAX_URLS // len(settings.LANGUAGES)
+
+
+def get_chunk_states():
+    """Return {chunk: (stamp, lastmod)} for every product sitemap chunk.
+
+    One grouped query, cached per catalog version. A chunk's stamp changes
+    when one of its products is edited or its active product count changes,
+    so only those chunks are rebuilt.
+    """
+    version = get_catalog_version()
+    key = SITEMAP_STATE_CACHE_KEY.format(version)
+    states = cache.get(key)
+    if states is None:
+        from .models import Product
+
+        rows = Product.objects.annotate(
+            chunk=(F('pk') - 1) / products_per_chunk()
+        ).values('chunk').annotate(
+            active=Count('pk', filter=Q(is_active=True)), newest=Max('updated_at')
+        ).order_by('chunk')
+        states = {
+            row['chunk']: (f"{row['active']}-{row['newest'].timestamp()}", row['newest'])
+            for row in rows if row['active']
+        }
+        cache.set(key, states, SITEMAP_CACHE_TIMEOUT)
+    return states
+
+
+def _language_prefixes(base_url, url_name, placeholder=None):
+    """{language: absolute URL} for a URL name, with `placeholder` as the slug."""
+    kwargs = {'slug': placeholder} if placeholder else None
+    urls = {}
+    for language, _ in settings.LANGUAGES:
+        with translation.override(language):
+            urls[language] = base_url + reverse(url_name, kwargs=kwargs)
+    return urls
+
+
+def _url_entries(urls, lastmod=None):
+    """One <url> per language, each listing all translations as alternates."""
+    alternates = ''.join(
+        f'<xhtml:link rel="alternate" hreflang="{language}" href="{escape(url)}"/>'
+        for language, url in urls.items()
+    )
+    alternates += (
+        f'<xhtml:link rel="alternate" hreflang="x-default" href="{escape(urls[settings.LANGUAGE_CODE])}"/>'
+    )
+    lastmod = f'<lastmod>{lastmod.date().isoformat()}</lastmod>' if lastmod else ''
+    return ''.join(
+        f'<url><loc>{escape(url)}</loc>{lastmod}{alternates}</url>\n' for url in urls.values()
+    )
+
+
+def build_product_chunk(base_url, chunk):
+    """Render one product sitemap chunk."""
+    from .models import Product
+
+    size = products_per_chunk()
+    placeholder = 'sitemap-slug-placeholder'
+    prefixes = _language_prefixes(base_url, 'products:product_detail', placeholder)
+    rows = Product.objects.filter(
+        is_active=True, pk__gt=chunk * size, pk__lte=(chunk + 1) * size
+    ).order_by('pk').values_list('slug', 'updated_at')
+
+    parts = [URLSET_OPEN]
+    for slug, updated_at in rows.iterator(chunk_size=2000):
+        urls = {language: prefix.replace(placeholder, slug) for language, prefix in prefixes.items()}
+        parts.append(_url_entries(urls, updated_at))
+    parts.append(URLSET_CLOSE)
+    return ''.join(parts)
+
+
+def build_pages(base_url):
+    """Render the sitemap of static shop pages and active categories."""
+    from .models import Category
+
+    placeholder = 'sitemap-slug-placeholder'
+    parts = [URLSET_OPEN]
+    for url_name in SHOP_PAGES:
+        parts.append(_url_entries(_language_prefixes(base_url, url_name)))
+    prefixes = _language_prefixes(base_url, 'products:category_detail', placeholder)
+    slugs = Category.objects.filter(is_active=True).order_by('pk').values_list('slug', flat=True)
+    for slug in slugs.iterator():
+        parts.append(_url_entries(
+            {language: prefix.replace(placeholder, slug) for language, prefix in prefixes.items()}
+        ))
+    parts.append(URLSET_CLOSE)
+    return ''.join(parts)
+
+
+def get_product_chunk(base_url, chunk):
+    """Cached product chunk XML, or None if the chunk has no active products."""
+    state = get_chunk_states().get(chunk)
+    if state is None:
+        return None
+    key = SITEMAP_CHUNK_CACHE_KEY.format(base_url, chunk, state[0])
+    xml = cache.get(key)
+    if xml is None:
+        xml = build_product_chunk(base_url, chunk)
+        cache.set(key, xml, SITEMAP_CACHE_TIMEOUT)
+    return xml
+
+
+def get_pages(base_url):
+    """Cached shop page and category sitemap, rebuilt when the catalog changes."""
+    key = SITEMAP_PAGES_CACHE_KEY.format(base_url, get_catalog_version())
+    xml = cache.get(key)
+    if xml is None:
+        xml = build_pages(base_url)
+        cache.set(key, xml, SITEMAP_CACHE_TIMEOUT)
+    return xml
+
+
+def build_index(base_url):
+    """Render the sitemap index pointing at the pages sitemap and every product chunk."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+        f"<sitemap><loc>{escape(base_url + reverse('sitemap_pages'))}</loc></sitemap>\n",
+    ]
+    for chunk, (_, lastmod) in sorted(get_chunk_states().items()):
+        loc = base_url + reverse('sitemap_products', kwargs={'chunk': chunk + 1})
+        parts.append(
+            f'<sitemap><loc>{escape(loc)}</loc><lastmod>{lastmod.date().isoformat()}</lastmod></sitemap>\n'
+        )
+    parts.append('</sitemapindex>\n')
+    return ''.join(parts)
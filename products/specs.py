@@ -0,0 +1,99 @@
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+
+
+# Attribute filters are passed as ?attr.<attribute slug>=<value>
+ATTRIBUTE_PARAM_PREFIX = 'attr.'
+
+# Most common values listed per attribute in the filter sidebar
+ATTRIBUTE_FACET_VALUE_LIMIT = 10
+
+SPECS_BATCH_SIZE = 1000
+
+
+def normalize_spec_value(value):
+    """Attribute values are matched case-insensitively."""
+    return str(value).strip().lower()
+
+
+def build_specs(product_model, value_model, product_ids=None, batch_size=SPECS_BATCH_SIZE):
+    """Rewrite each product's specs document ({attribute slug: value}) from its attribute values.
+
+    Takes the model classes as arguments so data migrations can reuse it
+    with historical models. Returns the number of products written.
+    """
+    products = product_model.objects.order_by('pk')
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        products = products.filter(pk__in=product_ids)
+
+    ids = list(products.values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        documents = {pk: {} for pk in ids[start:start + batch_size]}
+        rows = value_model.objects.filter(product_id__in=list(documents)).order_by('attribute_id').values_list(
+            'product_id', 'attribute__slug', 'value'
+        )
+        for product_id, slug, value in rows:
+            value = normalize_spec_value(value)
+            if value:
+                documents[product_id][slug] = value
+        product_model.objects.bulk_update(
+            [product_model(pk=pk, specs=document) for pk, document in documents.items()], ['specs']
+        )
+    return len(ids)
+
+
+def sync_product_specs(product_ids=None):
+    """Bring the specs documents of the given products (or all) in line with their attribute values."""
+    from .models import Product, ProductAttributeValue
+
+    return build_specs(Product, ProductAttributeValue, product_ids)
+
+
+def get_attribute_filters(params):
+    """Return the requested attribute filters as {attribute slug: value}."""
+    filters = {}
+    for name in sorted(params):
+        if not name.startswith(ATTRIBUTE_PARAM_PREFIX):
+            continue
+        slug = name[len(ATTRIBUTE_PARAM_PREFIX):]
+        value = normalize_spec_value(params.get(name, ''))
+        if slug and value:
+            filters[slug] = value
+    return filters
+
+
+def filter_by_attributes(queryset, filters):
+    """Limit products (or cards) to those matching every attribute filter.
+
+    All filters become a single containment test on the specs document,
+    answered from its GIN index however many attributes are combined.
+    """
+    if not filters:
+        return queryset
+    return queryset.filter(specs__contains=filters)
+
+
+def compute_attribute_facets(queryset):
+    """Count the products of a filtered queryset per attribute value."""
+    from .models import ProductAttributeValue
+
+    rows = ProductAttributeValue.objects.filter(
+        product_id__in=queryset.order_by().values('pk')
+    ).annotate(spec=Lower(Trim('value'))).exclude(spec='').values(
+        'attribute__slug', 'attribute__name', 'spec'
+    ).annotate(count=Count('product_id')).order_by('attribute__name', '-count', 'spec')
+
+    attributes = {}
+    for row in rows:
+        attribute = attributes.setdefault(row['attribute__slug'], {
+            'slug': row['attribute__slug'],
+            'name': row['attribute__name'],
+            'param': f"{ATTRIBUTE_PARAM_PREFIX}{row['attribute__slug']}",
+            'values': [],
+        })
+        if len(attribute['values']) < ATTRIBUTE_FACET_VALUE_LIMIT:
+            attribute['values'].append({'value': row['spec'], 'count': row['count']})
+    return list(attributes.values())
@@ -0,0 +1,195 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.forms import inlineformset_factory
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import ProductPartNumberFormSet
+from .importing import import_products
+from .models import Brand, Category, Product, ProductPartNumber
+from .pagination import CURSOR_PARAM, NUMBERED_PAGES, encode_cursor, get_ordering, paginate
+
+
+class CatalogTestCase(TestCase):
+    """A brand, a category and a few active products."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='Bosch', slug='bosch')
+        cls.category = Category.objects.create(name='Brakes', slug='brakes')
+        cls.products = [
+            Product.objects.create(
+                name=f'Brake Pad {number}', sku=f'BP-{number:04d}', description='Ceramic brake pad',
+                category=cls.category, brand=cls.brand, price=10 + number,
+            )
+            for number in range(1, 4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+
+class ProductListFilterTests(CatalogTestCase):
+
+    def test_unknown_vehicle_make_lists_nothing(self):
+        response = self.client.get(reverse('products:product_list'), {'make': 'no-such-make'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_products'], 0)
+
+    def test_unknown_category_lists_nothing(self):
+        response = self.client.get(reverse('products:product_list'), {'category': 'no-such-category'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_products'], 0)
+
+
+class NormalizedSkuTests(CatalogTestCase):
+
+    def test_new_sku_is_normalized(self):
+        product = self.products[0]
+        product.sku = '0 986-494.104'
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.sku_normalized, '0986494104')
+
+    def test_colliding_sku_left_empty_survives_saves(self):
+        # As left by the sku_normalized backfill for SKUs differing only in punctuation
+        first, second = self.products[:2]
+        Product.objects.filter(pk=first.pk).update(sku='0986494104')
+        Product.objects.filter(pk=second.pk).update(sku='0986-494-104', sku_normalized=None)
+
+        product = Product.objects.get(pk=second.pk)
+        product.stock_quantity += 1
+        product.save()
+        product.refresh_from_db()
+        self.assertIsNone(product.sku_normalized)
+
+
+class DerivedDataTests(CatalogTestCase):
+
+    def test_stock_change_leaves_fitments_and_search_vector_alone(self):
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.stock_quantity += 1
+        with mock.patch('products.signals.sync_product_fitments') as sync, \
+                mock.patch('products.signals.update_search_vectors') as update:
+            product.save()
+        sync.assert_not_called()
+        update.assert_not_called()
+
+    def test_compatibility_change_syncs_fitments(self):
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.compatible_makes = 'Audi'
+        with mock.patch('products.signals.sync_product_fitments') as sync:
+            product.save()
+        sync.assert_called_once_with([product])
+
+
+    @override_settings(CDN_PURGE_URL='http://proxy.test/purge')
+    def test_bulk_stock_update_purges_only_the_products_pages(self):
+        product = self.products[0]
+        with mock.patch('shop.cdn.purge') as purge:
+            Product.objects.filter(pk=product.pk).update(stock_quantity=3)
+        keys = purge.call_args.args
+        self.assertIn(f'product-{product.pk}', keys)
+        self.assertIn(f'category-products-{self.category.pk}', keys)
+        self.assertNotIn('catalog', keys)
+
+
+class PartNumberFormSetTests(CatalogTestCase):
+
+    def test_numbers_differing_in_punctuation_are_rejected(self):
+        FormSet = inlineformset_factory(
+            Product, ProductPartNumber, formset=ProductPartNumberFormSet, fields=('kind', 'number'), extra=0,
+        )
+        data = {'part_numbers-TOTAL_FORMS': 2, 'part_numbers-INITIAL_FORMS': 0}
+        for index, number in enumerate(['0 986-494.104', '0986494104']):
+            data.update({f'part_numbers-{index}-kind': 'oem', f'part_numbers-{index}-number': number})
+        formset = FormSet(data, instance=self.products[0])
+        self.assertFalse(formset.is_valid())
+        self.assertIn('number', formset.forms[1].errors)
+
+
+class LowStockTests(CatalogTestCase):
+
+    def test_low_stock_badge_is_shown(self):
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.stock_quantity = 2
+        product.save()
+        for read_model in (False, True):
+            with self.subTest(read_model=read_model), override_settings(CATALOG_READ_MODEL=read_model):
+                cache.clear()
+                response = self.client.get(reverse('products:product_list'))
+                self.assertContains(response, 'Low Stock', count=1)
+
+
+class ImportTests(CatalogTestCase):
+
+    def import_rows(self, *rows):
+        return import_products(enumerate(rows, start=2))
+
+    def test_sku_differing_in_punctuation_updates_stored_product(self):
+        self.import_rows({'sku': 'bp 0001', 'name': 'Brake Pad 1', 'price': '99.00', 'brand': 'Bosch', 'category': 'Brakes'})
+        self.assertEqual(Product.objects.count(), len(self.products))
+        product = Product.objects.get(pk=self.products[0].pk)
+        self.assertEqual((product.sku, product.price), ('BP-0001', 99))
+
+    def test_columns_a_row_leaves_empty_are_kept(self):
+        Product.objects.filter(pk=self.products[0].pk).update(stock_quantity=7, sale_price=9)
+        self.import_rows(
+            {'sku': 'BP-0001', 'name': 'Brake Pad 1', 'price': '20.00', 'brand': 'Bosch', 'category': 'Brakes',
+             'stock_quantity': '', 'sale_price': ''},
+            {'sku': 'BP-0002', 'name': 'Brake Pad 2', 'price': '21.00', 'brand': 'Bosch', 'category': 'Brakes',
+             'stock_quantity': '3', 'sale_price': ''},
+        )
+        first, second = Product.objects.filter(pk__in=[self.products[0].pk, self.products[1].pk]).order_by('pk')
+        self.assertEqual((first.price, first.stock_quantity, first.sale_price), (20, 7, 9))
+        self.assertEqual((second.price, second.stock_quantity), (21, 3))
+
+
+    def test_values_the_columns_cannot_hold_are_row_errors(self):
+        row = {'sku': 'BP-0009', 'name': 'Brake Pad 9', 'price': '9.00', 'brand': 'Bosch', 'category': 'Brakes'}
+        stats = self.import_rows(
+            {**row, 'sku': 'BP-0010', 'name': 'N' * 201},
+            {**row, 'sku': 'BP-0011', 'condition': 'broken'},
+            {**row, 'sku': 'BP-0012', 'price': 'NaN'},
+            {**row, 'sku': 'BP-0013', 'sale_price': 'Infinity'},
+            row,
+        )
+        self.assertEqual((stats.errors, stats.upserted), (4, 1))
+        self.assertTrue(Product.objects.filter(sku='BP-0009').exists())
+
+
+class PaginationTests(CatalogTestCase):
+
+    def test_numbered_pages_are_served(self):
+        response = self.client.get(reverse('products:product_list'), {'page': NUMBERED_PAGES})
+        self.assertEqual(response.status_code, 200)
+
+    def test_deep_page_numbers_are_refused(self):
+        response = self.client.get(reverse('products:product_list'), {'page': 1000})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('products:category_detail', args=[self.category.slug]), {'page': 1000})
+        self.assertEqual(response.status_code, 404)
+
+    def walk_cursor_pages(self, sort):
+        ordering = get_ordering(sort)
+        queryset = Product.objects.all()
+        first = queryset.order_by(*ordering).first()
+        seen = [first.pk]
+        cursor = encode_cursor(ordering, [first.created_at, first.pk], 'next')
+        # Bounded, as a cursor that repeats its boundary row never runs out
+        while cursor and len(seen) <= queryset.count():
+            page = paginate(RequestFactory().get('/', {CURSOR_PARAM: cursor}), queryset, sort, 1)
+            seen += [product.pk for product in page]
+            cursor = QueryDict(page.next_query).get(CURSOR_PARAM)
+        return seen
+
+    def test_cursor_pages_through_rows_created_together(self):
+        # As bulk_create and import_catalog leave them
+        Product.objects.update(created_at=timezone.now().replace(microsecond=123456))
+        for sort in ('-created_at', 'created_at'):
+            with self.subTest(sort=sort):
+                expected = list(Product.objects.order_by(*get_ordering(sort)).values_list('pk', flat=True))
+                self.assertEqual(self.walk_cursor_pages(sort), expected)
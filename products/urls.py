@@ -6,6 +6,11 @@ app_name = 'products'
 urlpatterns = [
     path('', views.ProductListView.as_view(), name='product_list'),
     path('search-suggestions/', views.search_suggestions, name='search_suggestions'),
+    path('vehicles/makes/', views.vehicle_makes, name='vehicle_makes'),
+    path('vehicles/<slug:make>/models/', views.vehicle_models, name='vehicle_models'),
+    path('vehicles/<slug:make>/years/', views.vehicle_years, name='vehicle_years'),
+    path('vehicles/<slug:make>/<slug:model>/years/', views.vehicle_years, name='vehicle_model_years'),
+    path('feeds/catalog.<str:feed_format>', views.catalog_feed, name='catalog_feed'),
     path('category/<slug:slug>/', views.CategoryDetailView.as_view(), name='category_detail'),
     path('<slug:slug>/', views.ProductDetailView.as_view(), name='product_detail'),
 ]
\ No newline at end of file
@@ -0,0 +1,76 @@
+import time
+
+from django.core.cache import cache
+
+
+VERSION_CACHE_KEY = 'version:{}'
+
+
+def _initial_version():
+    # Seeded from the clock so versions never repeat after a cache flush,
+    # which keeps ETags derived from them unique.
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    """Return the current version number for a cache namespace."""
+    key = VERSION_CACHE_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespaces):
+    """Return {namespace: version} for several namespaces in one cache round trip."""
+    keys = {VERSION_CACHE_KEY.format(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: version for key, version in found.items()}
+    for namespace in keys.values():
+        if namespace not in versions:
+            versions[namespace] = get_version(namespace)
+    return versions
+
+
+def bump_version(*namespaces):
+    """Invalidate everything cached under the given namespaces."""
+    for namespace in namespaces:
+        key = VERSION_CACHE_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+
+# Bumped whenever products, brands or categories change.
+CATALOG_NAMESPACE = 'catalog'
+
+
+def get_catalog_version():
+    return get_version(CATALOG_NAMESPACE)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_NAMESPACE)
+
+
+def reviews_namespace(product_id):
+    """Namespace bumped whenever one product's reviews change."""
+    return f'reviews:{product_id}'
+
+
+def images_namespace(product_id):
+    """Namespace bumped whenever one product's images change."""
+    return f'images:{product_id}'
+
+
+def attributes_namespace(product_id):
+    """Namespace bumped whenever one product's attribute values change."""
+    return f'attributes:{product_id}'
+
+
+# Bumped when attribute definitions (names shown on every product) change.
+ATTRIBUTES_NAMESPACE = 'attributes'
+# Bumped after the frequently-bought-together rows are rebuilt.
+RECOMMENDATIONS_NAMESPACE = 'recommendations'
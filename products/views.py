@@ -1,14 +1,42 @@
-from django.shortcuts import render, get_object_or_404
-from django.db.models import Q, Avg, Count
-from django.core.paginator import Paginator
+import os
+from wsgiref.util import FileWrapper
+
+from django.db.models import Count
 from django.views.generic import ListView, DetailView
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
-from .models import Product, Category, Brand, ProductReview
+from .cards import listing_queryset
+from .categories import get_breadcrumbs, get_category_node, get_children, get_descendant_ids
+from .conditional import ConditionalPageMixin, ConditionalDetailMixin
+from .counting import get_result_count
+from .facets import get_facets
+from .feeds import (
+    FEED_FORMATS, FEED_BLOCK_SIZE, feed_chunks, get_feed_state, get_pregenerated_feed, gzip_chunks,
+    open_pregenerated_feed,
+)
+from .fragments import get_fragment_versions, lazy_list, FRAGMENT_CACHE_TIMEOUT
+from .fitment import (
+    filter_by_vehicle, get_vehicle_makes, get_vehicle_models, get_vehicle_years,
+    get_vehicle_makes_version, get_vehicle_make_version,
+)
+from .models import Product, ProductCard, Category, Brand, ProductReview, VehicleMake, VehicleModel
+from .pagination import paginate, SORT_ORDERINGS, DEFAULT_SORT
+from .recommendations import get_frequently_bought_together
+from .search import search_products, get_suggestions, SUGGESTION_CACHE_TIMEOUT
+from .sitemaps import build_index, get_pages, get_product_chunk
+from .specs import ATTRIBUTE_PARAM_PREFIX, filter_by_attributes, get_attribute_filters
+from .versioning import get_catalog_version
 from cart.forms import AddToCartForm
+from shop.cdn import (
+    set_surrogate_keys, product_key, category_key, category_products_key, brand_key, brand_products_key,
+    PRODUCT_LIST_KEY,
+)
 
 
-class ProductListView(ListView):
+class ProductListView(ConditionalPageMixin, ListView):
     """Product listing with filtering and search."""
     
     model = Product
@@ -16,28 +44,31 @@ class ProductListView(ListView):
     context_object_name = 'products'
     paginate_by = 12
     
+    def get_page_validator(self):
+        # Results, counts and facets only change with the catalog
+        return get_catalog_version()
+    
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True).select_related('category', 'brand').prefetch_related('images')
+        # Flat ProductCard rows in read-model mode, joined products otherwise
+        queryset = listing_queryset()
         
         # Search functionality
         search_query = self.request.GET.get('search')
         if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(brand__name__icontains=search_query) |
-                Q(category__name__icontains=search_query)
-            )
+            queryset = search_products(queryset, search_query)
         
         # Category filter
         category_slug = self.request.GET.get('category')
         if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+            # Includes products filed under subcategories
+            node = get_category_node(slug=category_slug)
+            queryset = queryset.filter(category_id__in=get_descendant_ids(node['id']) if node else [])
         
         # Brand filter
         brand_slug = self.request.GET.get('brand')
         if brand_slug:
-            queryset = queryset.filter(brand__slug=brand_slug)
+            brand_lookup = 'brand_slug' if queryset.model is ProductCard else 'brand__slug'
+            queryset = queryset.filter(**{brand_lookup: brand_slug})
         
         # Price filter
         min_price = self.request.GET.get('min_price')
@@ -57,18 +88,84 @@ class ProductListView(ListView):
         if in_stock == 'true':
             queryset = queryset.filter(stock_quantity__gt=0)
         
-        # Sorting
-        sort_by = self.request.GET.get('sort', '-created_at')
-        valid_sorts = ['name', '-name', 'price', '-price', '-created_at', 'created_at']
-        if sort_by in valid_sorts:
-            queryset = queryset.order_by(sort_by)
+        # Rating filter
+        min_rating = self.request.GET.get('min_rating')
+        if min_rating and min_rating.isdigit():
+            queryset = queryset.filter(rating_average__gte=int(min_rating))
+        
+        # Attribute filters (?attr.position=front&attr.material=ceramic)
+        queryset = filter_by_attributes(queryset, get_attribute_filters(self.request.GET))
+        
+        # Vehicle fitment filter ("parts that fit my 2015 Audi A4")
+        make = self.request.GET.get('make')
+        if make:
+            year = self.request.GET.get('year')
+            queryset = filter_by_vehicle(
+                queryset,
+                make=make,
+                model=self.request.GET.get('model'),
+                year=int(year) if year and year.isdigit() else None
+            )
+        
+        # Sorting (searches keep relevance order unless a sort is requested);
+        # the ordering itself is applied by the keyset-aware paginator
+        default_sort = 'relevance' if search_query else DEFAULT_SORT
+        sort_by = self.request.GET.get('sort', default_sort)
+        if sort_by not in SORT_ORDERINGS or (sort_by == 'relevance' and not search_query):
+            sort_by = default_sort
+        self.sort = sort_by
         
         return queryset
     
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate(self.request, queryset, self.sort, page_size)
+        return (page.paginator, page, page.object_list, page.has_other_pages())
+    
+    def get_listing_keys(self, brands):
+        """Surrogate keys for the set of products this listing can show."""
+        keys = []
+        category_slug = self.request.GET.get('category')
+        node = get_category_node(slug=category_slug) if category_slug else None
+        if node:
+            keys += [category_key(node['id']), category_products_key(node['id'])]
+        brand_id = next((brand.pk for brand in brands if brand.slug == self.request.GET.get('brand')), None)
+        if brand_id:
+            keys += [brand_key(brand_id), brand_products_key(brand_id)]
+        return keys or [PRODUCT_LIST_KEY]
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Tagged after rendering, when the page's products have been loaded
+        response.add_post_render_callback(lambda response: set_surrogate_keys(self.request, response, [
+            *self.get_listing_keys(context['brands']), *(product_key(product.pk) for product in context['products']),
+        ]))
+        return response
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.filter(is_active=True, parent=None)
-        context['brands'] = Brand.objects.filter(is_active=True)
+        categories = list(Category.objects.filter(is_active=True, parent=None))
+        brands = list(Brand.objects.filter(is_active=True))
+        
+        # Facet counts for the current filters, computed in one aggregate query
+        facets = get_facets(
+            self.object_list, self.request.GET,
+            [cat.pk for cat in categories], [b.pk for b in brands]
+        )
+        for cat in categories:
+            cat.facet_count = facets['categories'].get(cat.pk, 0)
+        for b in brands:
+            b.facet_count = facets['brands'].get(b.pk, 0)
+        attribute_filters = get_attribute_filters(self.request.GET)
+        for attribute in facets['attributes']:
+            attribute['selected'] = attribute_filters.get(attribute['slug'], '')
+        
+        context['categories'] = categories
+        context['brands'] = brands
+        context['facets'] = facets
+        context['total_products'] = get_result_count(self.object_list)
+        context['vehicle_makes'] = VehicleMake.objects.all()
+        make = self.request.GET.get('make')
+        context['vehicle_models'] = VehicleModel.objects.filter(make__slug=make) if make else VehicleModel.objects.none()
         context['current_filters'] = {
             'search': self.request.GET.get('search', ''),
             'category': self.request.GET.get('category', ''),
@@ -77,12 +174,19 @@ class ProductListView(ListView):
             'max_price': self.request.GET.get('max_price', ''),
             'condition': self.request.GET.get('condition', ''),
             'in_stock': self.request.GET.get('in_stock', ''),
+            'make': self.request.GET.get('make', ''),
+            'model': self.request.GET.get('model', ''),
+            'year': self.request.GET.get('year', ''),
+            'min_rating': self.request.GET.get('min_rating', ''),
             'sort': self.request.GET.get('sort', '-created_at'),
+            # Carried along by the filter links like the parameters above
+            **{f'{ATTRIBUTE_PARAM_PREFIX}{slug}': value for slug, value in attribute_filters.items()},
         }
+        context['attribute_filters'] = attribute_filters
         return context
 
 
-class ProductDetailView(DetailView):
+class ProductDetailView(ConditionalDetailMixin, DetailView):
     """Product detail page with reviews and related products."""
     
     model = Product
@@ -92,37 +196,59 @@ class ProductDetailView(DetailView):
     slug_url_kwarg = 'slug'
     
     def get_queryset(self):
-        return Product.objects.filter(is_active=True).select_related('category', 'brand').prefetch_related(
-            'images', 'attributes__attribute', 'reviews__user'
-        )
+        return Product.objects.filter(is_active=True).select_related('category').for_cards()
+    
+    def get_page_validator(self):
+        # The fragment versions cover reviews, images, attributes and the catalog
+        product = self.get_object()
+        return product.updated_at, get_fragment_versions(product.pk)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        product = self.get_object()
+        product = self.object
         
         # Add to cart form
         context['add_to_cart_form'] = AddToCartForm()
         
-        # Product reviews
-        reviews = ProductReview.objects.filter(product=product, is_approved=True).select_related('user')
-        context['reviews'] = reviews[:10]  # Show first 10 reviews
-        context['total_reviews'] = reviews.count()
+        # Fragment contents are lazy, so they are only queried when the
+        # cached fragment that renders them has been invalidated.
+        context['fragment_cache_timeout'] = FRAGMENT_CACHE_TIMEOUT
+        context['fragment_versions'] = get_fragment_versions(product.pk)
+        context['images'] = lazy_list(product.images.all)
+        context['attributes'] = lazy_list(lambda: product.attributes.select_related('attribute'))
         
-        # Rating distribution
-        rating_counts = reviews.values('rating').annotate(count=Count('rating')).order_by('rating')
-        context['rating_distribution'] = {item['rating']: item['count'] for item in rating_counts}
+        # Product reviews (count and distribution are stored on the product)
+        context['reviews'] = lazy_list(
+            lambda: ProductReview.objects.filter(product=product, is_approved=True).select_related('user')[:10]
+        )
+        context['total_reviews'] = product.review_count
+        context['rating_distribution'] = product.rating_distribution
         
-        # Related products
-        related_products = Product.objects.filter(
-            category=product.category,
-            is_active=True
-        ).exclude(id=product.id).select_related('brand').prefetch_related('images')[:4]
-        context['related_products'] = related_products
+        context['breadcrumbs'] = get_breadcrumbs(product.category_id)
+        context['related_products'] = lazy_list(lambda: self.get_related_products(product))
         
         return context
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        product = self.object
+        return set_surrogate_keys(self.request, response, [
+            product_key(product.pk), brand_key(product.brand_id),
+            *(category_key(node['id']) for node in context['breadcrumbs']),
+        ])
+    
+    def get_related_products(self, product, limit=4):
+        """Frequently bought together, topped up from the same category."""
+        related_products = list(get_frequently_bought_together(product, limit=limit))
+        if len(related_products) < limit:
+            related_products += Product.objects.filter(
+                category=product.category,
+                is_active=True
+            ).exclude(id__in=[product.id, *(p.id for p in related_products)]).for_cards()[:limit - len(related_products)]
+        return related_products
 
 
-class CategoryDetailView(DetailView):
+class CategoryDetailView(ConditionalDetailMixin, DetailView):
     """Category page with products."""
     
     model = Category
@@ -131,68 +257,180 @@ class CategoryDetailView(DetailView):
     slug_field = 'slug'
     slug_url_kwarg = 'slug'
     
+    def get_page_validator(self):
+        return self.get_object().pk, get_catalog_version()
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        category = self.get_object()
+        category = self.object
         
-        # Get products in this category
+        # Get products in this category and all of its subcategories
+        category_ids = get_descendant_ids(category.pk) or [category.pk]
         products = Product.objects.filter(
-            category=category, 
+            category_id__in=category_ids,
             is_active=True
-        ).select_related('brand').prefetch_related('images')
+        ).for_cards()
         
         # Apply filters similar to ProductListView
         search_query = self.request.GET.get('search')
         if search_query:
-            products = products.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(brand__name__icontains=search_query)
-            )
+            products = search_products(products, search_query)
         
-        # Pagination
-        paginator = Paginator(products, 12)
-        page_number = self.request.GET.get('page')
-        context['products'] = paginator.get_page(page_number)
+        # Pagination (numbered for the first pages, cursor-based after)
+        sort_by = self.request.GET.get('sort')
+        if sort_by not in SORT_ORDERINGS or (sort_by == 'relevance' and not search_query):
+            sort_by = 'relevance' if search_query else DEFAULT_SORT
+        page = paginate(self.request, products, sort_by, 12)
+        context['products'] = page
+        context['total_products'] = get_result_count(products)
         
-        # Subcategories
-        context['subcategories'] = category.subcategories.filter(is_active=True)
+        # Subcategories with product counts rolled up from their own subtrees
+        children = get_children(category.pk)
+        subcategories = Category.objects.filter(pk__in=[child['id'] for child in children])
+        if subcategories:
+            counts = dict(
+                Product.objects.filter(category_id__in=category_ids, is_active=True)
+                .order_by().values_list('category_id').annotate(count=Count('id'))
+            )
+            for subcategory in subcategories:
+                subcategory.product_count = sum(counts.get(pk, 0) for pk in get_descendant_ids(subcategory.pk))
+        context['subcategories'] = subcategories
+        context['breadcrumbs'] = get_breadcrumbs(category.pk)
         
         return context
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        category = self.object
+        # Subcategory names are shown too; products are tagged once rendered
+        response.add_post_render_callback(lambda response: set_surrogate_keys(self.request, response, [
+            category_key(category.pk), category_products_key(category.pk),
+            *(category_key(subcategory.pk) for subcategory in context['subcategories']),
+            *(product_key(product.pk) for product in context['products']),
+        ]))
+        return response
 
 
+@cache_control(public=True, max_age=SUGGESTION_CACHE_TIMEOUT)
 def search_suggestions(request):
     """AJAX endpoint for search suggestions."""
-    query = request.GET.get('q', '')
-    suggestions = []
-    
-    if len(query) >= 2:
-        # Product suggestions
-        products = Product.objects.filter(
-            Q(name__icontains=query) | Q(brand__name__icontains=query),
-            is_active=True
-        ).select_related('brand')[:5]
-        
-        for product in products:
-            suggestions.append({
-                'type': 'product',
-                'name': product.name,
-                'brand': product.brand.name,
-                'url': product.get_absolute_url(),
-                'price': str(product.get_price),
-            })
-        
-        # Category suggestions
-        categories = Category.objects.filter(
-            name__icontains=query, 
-            is_active=True
-        )[:3]
-        
-        for category in categories:
-            suggestions.append({
-                'type': 'category',
-                'name': category.name,
-                'url': category.get_absolute_url(),
-            })
-    
-    return JsonResponse({'suggestions': suggestions})
\ No newline at end of file
+    suggestions = get_suggestions(request.GET.get('q', ''))
+    return JsonResponse({'suggestions': suggestions})
+
+
+# Vehicle picker endpoints. Lists come from a versioned cache, and the ETag is
+# derived from the cache version so revalidation costs a single cache read.
+VEHICLE_PICKER_MAX_AGE = 60 * 5
+
+
+def _vehicle_makes_etag(request):
+    return f'makes-{get_vehicle_makes_version()}'
+
+
+def _vehicle_make_etag(request, make, model=None):
+    return f'make-{make}-{get_vehicle_make_version(make)}'
+
+
+def _get_known_make(make):
+    if not any(item['slug'] == make for item in get_vehicle_makes()):
+        raise Http404('Unknown vehicle make')
+
+
+@cache_control(public=True, max_age=VEHICLE_PICKER_MAX_AGE)
+@condition(etag_func=_vehicle_makes_etag)
+def vehicle_makes(request):
+    """JSON list of vehicle makes with parts."""
+    return JsonResponse({'makes': get_vehicle_makes()})
+
+
+@cache_control(public=True, max_age=VEHICLE_PICKER_MAX_AGE)
+@condition(etag_func=_vehicle_make_etag)
+def vehicle_models(request, make):
+    """JSON list of models for a vehicle make."""
+    _get_known_make(make)
+    return JsonResponse({'make': make, 'models': get_vehicle_models(make)})
+
+
+@cache_control(public=True, max_age=VEHICLE_PICKER_MAX_AGE)
+@condition(etag_func=_vehicle_make_etag)
+def vehicle_years(request, make, model=None):
+    """JSON list of years with parts for a vehicle make and optional model."""
+    _get_known_make(make)
+    if model and not any(item['slug'] == model for item in get_vehicle_models(make)):
+        raise Http404('Unknown vehicle model')
+    return JsonResponse({'make': make, 'model': model, 'years': get_vehicle_years(make, model)})
+
+
+# Catalog feeds for marketplaces. Validators come from the catalog version,
+# and the body is gzipped here (not by GZipMiddleware) so a pre-generated
+# .gz file can be sent without recompressing it.
+FEED_MAX_AGE = 60 * 15
+
+
+def _feed_etag(request, feed_format):
+    version, _ = get_feed_state()
+    # Weak: the same version is served both gzipped and plain
+    return f'W/"feed-{feed_format}-{version}"'
+
+
+def _feed_last_modified(request, feed_format):
+    return get_feed_state()[1]
+
+
+@cache_control(public=True, max_age=FEED_MAX_AGE)
+@condition(etag_func=_feed_etag, last_modified_func=_feed_last_modified)
+def catalog_feed(request, feed_format):
+    """Stream the active catalog as CSV, JSON Lines or merchant XML."""
+    if feed_format not in FEED_FORMATS:
+        raise Http404('Unknown feed format')
+    compressed = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+    path = get_pregenerated_feed(feed_format)
+    if path:
+        response = StreamingHttpResponse(
+            FileWrapper(open_pregenerated_feed(path, compressed), FEED_BLOCK_SIZE),
+            content_type=FEED_FORMATS[feed_format],
+        )
+        if compressed:
+            response['Content-Length'] = os.path.getsize(path)
+    else:
+        chunks = feed_chunks(feed_format, request.build_absolute_uri('/')[:-1])
+        response = StreamingHttpResponse(
+            gzip_chunks(chunks) if compressed else chunks, content_type=FEED_FORMATS[feed_format]
+        )
+
+    if compressed:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Disposition'] = f'inline; filename="catalog.{feed_format}"'
+    return response
+
+
+# XML sitemaps, served outside i18n_patterns. Each file lists every
+# language's URL for a page; the XML itself is cached in products.sitemaps.
+SITEMAP_MAX_AGE = 60 * 60
+
+
+def _sitemap_response(xml):
+    return HttpResponse(xml, content_type='application/xml; charset=utf-8')
+
+
+@cache_control(public=True, max_age=SITEMAP_MAX_AGE)
+def sitemap_index(request):
+    """Sitemap index listing the pages sitemap and each product chunk."""
+    return _sitemap_response(build_index(request.build_absolute_uri('/')[:-1]))
+
+
+@cache_control(public=True, max_age=SITEMAP_MAX_AGE)
+def sitemap_pages(request):
+    """Sitemap of static shop pages and categories."""
+    return _sitemap_response(get_pages(request.build_absolute_uri('/')[:-1]))
+
+
+@cache_control(public=True, max_age=SITEMAP_MAX_AGE)
+def sitemap_products(request, chunk):
+    """One chunk of the product sitemap (numbered from 1)."""
+    xml = get_product_chunk(request.build_absolute_uri('/')[:-1], chunk - 1) if chunk > 0 else None
+    if xml is None:
+        raise Http404('No such sitemap')
+    return _sitemap_response(xml)
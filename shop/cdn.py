@@ -0,0 +1,167 @@
+import json
+import logging
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+
+logger = logging.getLogger(__name__)
+
+
+# Surrogate keys. Pages are tagged with the keys of everything they show,
+# and model changes purge the matching keys from the caching proxy.
+#
+# - product-N, category-N, brand-N: pages that display that object
+# - category-products-N, brand-products-N: listings filtered to a category
+#   (or any of its descendants) or brand, whose members can change
+# - product-list: other listings (unfiltered list, home page)
+# - catalog: every catalog page, for purging everything at once
+CATALOG_KEY = 'catalog'
+PRODUCT_LIST_KEY = 'product-list'
+BANNERS_KEY = 'banners'
+
+
+def product_key(pk):
+    return f'product-{pk}'
+
+
+def category_key(pk):
+    return f'category-{pk}'
+
+
+def category_products_key(pk):
+    return f'category-products-{pk}'
+
+
+def brand_key(pk):
+    return f'brand-{pk}'
+
+
+def brand_products_key(pk):
+    return f'brand-products-{pk}'
+
+
+def set_surrogate_keys(request, response, keys):
+    """Tag a response with its surrogate keys (Fastly and Cloudflare header styles).
+
+    Whether the proxy may store the page is decided afterwards by
+    SurrogateControlMiddleware, once cookies have been set.
+    """
+    keys = list(dict.fromkeys([CATALOG_KEY, *keys]))
+    response['Surrogate-Key'] = ' '.join(keys)
+    response['Cache-Tag'] = ','.join(keys)
+    return response
+
+
+def is_shareable(request, response):
+    """Whether nothing visitor-specific went into a response.
+
+    The session holds the signed-in user, the cart and flash messages, and
+    rendering a CSRF token (or anything else that needs a cookie) makes the
+    response set one. A 304 answers for the page it revalidates, so it is
+    judged the same way.
+    """
+    user = getattr(request, 'user', None)
+    return (
+        request.method in ('GET', 'HEAD')
+        and response.status_code in (200, 304)
+        and not response.cookies
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and not (user and user.is_authenticated)
+    )
+
+
+class SurrogateControlMiddleware:
+    """Let the caching proxy store tagged pages that are the same for every visitor.
+
+    Listed before the session, CSRF and message middleware so it sees the
+    cookies they set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_shareable(request, response):
+            # A cookie set after the view marked the page public
+            if response.cookies and 'public' in response.get('Cache-Control', ''):
+                patch_cache_control(response, private=True)
+        elif settings.CDN_SURROGATE_MAX_AGE and 'Surrogate-Key' in response:
+            response['Surrogate-Control'] = f'max-age={settings.CDN_SURROGATE_MAX_AGE}'
+        return response
+
+
+# Purging. Keys are collected per thread until the surrounding transaction
+# commits, then handed to a single background sender that merges everything
+# pending and posts it in batches, so a bulk import of thousands of products
+# becomes a handful of purge requests.
+
+_local = threading.local()
+_outbox = set()
+_outbox_lock = threading.Lock()
+_executor = None
+
+
+def purge(*keys):
+    """Purge surrogate keys from the proxy once the current transaction commits."""
+    if not settings.CDN_PURGE_URL or not keys:
+        return
+    pending = getattr(_local, 'keys', None)
+    if pending is None:
+        pending = _local.keys = set()
+    pending.update(keys)
+    # Registered on every call; the first callback to run drains the set.
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    keys = getattr(_local, 'keys', None)
+    if not keys:
+        return
+    _local.keys = None
+    with _outbox_lock:
+        scheduled = bool(_outbox)
+        _outbox.update(keys)
+    if not scheduled:
+        _get_executor().submit(_send_pending)
+
+
+def _get_executor():
+    global _executor
+    with _outbox_lock:
+        if _executor is None:
+            # One sender, so purges are sent in order and merged while queued
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cdn-purge')
+        return _executor
+
+
+def _send_pending():
+    with _outbox_lock:
+        keys = sorted(_outbox)
+        _outbox.clear()
+    batch_size = settings.CDN_PURGE_BATCH_SIZE
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        try:
+            send_purge(batch)
+        except Exception:
+            logger.exception('Could not purge %d surrogate keys', len(batch))
+
+
+def send_purge(keys):
+    """POST one batch of keys to CDN_PURGE_URL."""
+    headers = {
+        'Content-Type': 'application/json',
+        'Surrogate-Key': ' '.join(keys),
+    }
+    if settings.CDN_PURGE_TOKEN:
+        headers['Authorization'] = f'Bearer {settings.CDN_PURGE_TOKEN}'
+    request = urllib.request.Request(
+        settings.CDN_PURGE_URL, data=json.dumps({'keys': keys}).encode(), headers=headers, method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=settings.CDN_PURGE_TIMEOUT) as response:
+        response.read()
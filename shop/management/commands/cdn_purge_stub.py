@@ -0,0 +1,42 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Runs a local stand-in for the caching proxy purge API that prints the surrogate keys it receives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8081, help='Port to listen on (default: 8081)')
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+
+        class PurgeHandler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                try:
+                    keys = json.loads(body)['keys']
+                except (ValueError, KeyError, TypeError):
+                    keys = self.headers.get('Surrogate-Key', '').split()
+                stdout.write(f"{self.path}: purged {len(keys)} keys: {' '.join(keys)}")
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({'status': 'ok', 'purged': len(keys)}).encode())
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), PurgeHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Listening on http://127.0.0.1:{options['port']}/ (set CDN_PURGE_URL=http://127.0.0.1:{options['port']}/purge)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from shop.renditions import generate_renditions, get_manifest
+from shop.signals import RENDITION_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Generates responsive WebP/JPEG renditions for uploaded catalog and banner images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate manifests even for images that already have renditions')
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        for model, field in RENDITION_FIELDS.items():
+            names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(field, flat=True)
+            for name in names.iterator():
+                if not options['force'] and get_manifest(name):
+                    continue
+                try:
+                    generate_renditions(name)
+                    generated += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'Skipped {name}: {e}'))
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {generated} images ({failed} failed)'))
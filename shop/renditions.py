@@ -0,0 +1,142 @@
+import hashlib
+import json
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Fixed widths generated for every uploaded image. Widths larger than the
+# original are skipped, so small logos only get the sizes they can fill.
+RENDITION_WIDTHS = (320, 640, 960, 1280)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+RENDITION_DIR = 'renditions'
+
+# Manifests are stored as JSON next to the renditions; the cache only saves
+# the storage read. Images without one are remembered for a short while.
+MANIFEST_DIR = posixpath.join(RENDITION_DIR, 'manifests')
+MANIFEST_CACHE_KEY = 'renditions:{}'
+MANIFEST_MISS_TIMEOUT = 60 * 5
+LOCK_CACHE_KEY = 'renditions:lock:{}'
+LOCK_TIMEOUT = 60 * 5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _manifest_key(name):
+    return MANIFEST_CACHE_KEY.format(hashlib.md5(name.encode()).hexdigest())
+
+
+def manifest_name(name):
+    return posixpath.join(MANIFEST_DIR, f'{hashlib.md5(name.encode()).hexdigest()}.json')
+
+
+def rendition_name(digest, width, ext):
+    # Content-hash names never change for the same bytes, so renditions can be
+    # served with far-future cache headers and shared between duplicate uploads.
+    return posixpath.join(RENDITION_DIR, digest[:2], f'{digest}-{width}w.{ext}')
+
+
+def get_manifest(name, storage=default_storage):
+    """Return {'digest', 'width', 'widths'} for an image that has renditions, else None."""
+    if not name:
+        return None
+    key = _manifest_key(name)
+    manifest = cache.get(key)
+    if manifest is None:
+        path = manifest_name(name)
+        if storage.exists(path):
+            with storage.open(path, 'rb') as stored:
+                manifest = json.load(stored)
+            cache.set(key, manifest, None)
+        else:
+            manifest = False
+            cache.set(key, manifest, MANIFEST_MISS_TIMEOUT)
+    return manifest or None
+
+
+def _flatten(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def generate_renditions(name, storage=default_storage):
+    """Write every width/format variant of a stored image and store its manifest."""
+    with storage.open(name, 'rb') as source:
+        data = source.read()
+    digest = hashlib.sha1(data).hexdigest()
+
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    image = _flatten(image)
+    widths = [width for width in RENDITION_WIDTHS if width < image.width] or [image.width]
+
+    for width in widths:
+        resized = None
+        for ext, (image_format, options) in RENDITION_FORMATS.items():
+            target = rendition_name(digest, width, ext)
+            if storage.exists(target):
+                continue
+            if resized is None:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            storage.save(target, ContentFile(buffer.getvalue()))
+
+    manifest = {'digest': digest, 'width': image.width, 'widths': widths}
+    path = manifest_name(name)
+    if storage.exists(path):
+        storage.delete(path)
+    storage.save(path, ContentFile(json.dumps(manifest).encode()))
+    cache.set(_manifest_key(name), manifest, None)
+    return manifest
+
+
+def _run(name):
+    try:
+        generate_renditions(name)
+    except Exception:
+        logger.exception('Could not generate renditions for %s', name)
+    finally:
+        cache.delete(LOCK_CACHE_KEY.format(name))
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+                thread_name_prefix='renditions',
+            )
+        return _executor
+
+
+def schedule_renditions(name):
+    """Queue rendition generation on the worker pool unless it is already queued."""
+    if not name or not cache.add(LOCK_CACHE_KEY.format(name), True, LOCK_TIMEOUT):
+        return
+    _get_executor().submit(_run, name)
+
+
+def rendition_srcset(manifest, ext):
+    return ', '.join(
+        f"{default_storage.url(rendition_name(manifest['digest'], width, ext))} {width}w"
+        for width in manifest['widths']
+    )
@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from products.categories import get_category_node, path_ids
+from products.models import Product, ProductImage, ProductReview, Brand, Category
+from .cdn import (
+    purge, product_key, category_key, category_products_key, brand_key, brand_products_key,
+    PRODUCT_LIST_KEY, BANNERS_KEY,
+)
+from .models import Banner
+from .renditions import get_manifest, schedule_renditions
+
+
+# Image field of every model whose uploads get responsive renditions.
+RENDITION_FIELDS = {
+    ProductImage: 'image',
+    Brand: 'logo',
+    Category: 'image',
+    Banner: 'image',
+}
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Banner)
+def queue_image_renditions(sender, instance, raw=False, **kwargs):
+    """Generate renditions for a new upload in the background once it is committed."""
+    if raw:
+        return
+    name = getattr(instance, RENDITION_FIELDS[sender]).name
+    if name and get_manifest(name) is None:
+        transaction.on_commit(lambda: schedule_renditions(name))
+
+
+# Caching proxy purges. Keys are queued and sent after the commit, see shop.cdn.
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def purge_product(sender, instance, raw=False, **kwargs):
+    """Purge the product page and the listings it belongs to."""
+    if raw:
+        return
+    # The product is listed under its category and every ancestor
+    node = get_category_node(instance.category_id)
+    category_ids = path_ids(node['path']) if node else [instance.category_id]
+    purge(
+        product_key(instance.pk), brand_products_key(instance.brand_id), PRODUCT_LIST_KEY,
+        *(category_products_key(pk) for pk in category_ids),
+    )
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def purge_product_details(sender, instance, raw=False, **kwargs):
+    """Purge the page of the product an image or review belongs to."""
+    if raw:
+        return
+    purge(product_key(instance.product_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category(sender, instance, raw=False, **kwargs):
+    """Purge pages showing a category."""
+    if raw:
+        return
+    # Category names also appear in listing filters and on the home page
+    purge(category_key(instance.pk), PRODUCT_LIST_KEY)
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def purge_brand(sender, instance, raw=False, **kwargs):
+    """Purge pages showing a brand."""
+    if raw:
+        return
+    purge(brand_key(instance.pk), PRODUCT_LIST_KEY)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def purge_banners(sender, raw=False, **kwargs):
+    """Purge pages showing banners."""
+    if raw:
+        return
+    purge(BANNERS_KEY)
@@ -0,0 +1,35 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from shop.renditions import get_manifest, rendition_name, rendition_srcset, schedule_renditions
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', loading='lazy', **attrs):
+    """Render an uploaded image as a <picture> with WebP and JPEG srcsets.
+
+    Usage: {% responsive_image product.primary_image.image alt=product.name sizes="(max-width: 768px) 50vw, 300px" class="card-img-top" %}
+
+    Until the renditions exist the original is served and generation is
+    queued on the rendition worker pool.
+    """
+    if not image:
+        return ''
+    attrs = flatatt({'alt': alt, 'loading': loading, 'decoding': 'async', **attrs})
+
+    manifest = get_manifest(image.name)
+    if manifest is None:
+        schedule_renditions(image.name)
+        return format_html('<img src="{}"{}>', image.url, attrs)
+
+    fallback = default_storage.url(rendition_name(manifest['digest'], manifest['widths'][-1], 'jpg'))
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        rendition_srcset(manifest, 'webp'), sizes,
+        fallback, rendition_srcset(manifest, 'jpg'), sizes, attrs,
+    )
@@ -1,3 +1,58 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from products.models import Brand, Category, Product
+from .cdn import is_shareable
+
+
+@override_settings(CDN_SURROGATE_MAX_AGE=600)
+class SurrogateControlTests(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+
+    def test_plain_anonymous_response_is_shareable(self):
+        self.assertTrue(is_shareable(self.request, HttpResponse()))
+
+    def test_response_setting_a_cookie_is_private(self):
+        response = HttpResponse()
+        response.set_cookie('csrftoken', 'token')
+        self.assertFalse(is_shareable(self.request, response))
+
+    def test_visitor_with_a_session_is_private(self):
+        self.request.COOKIES['sessionid'] = 'key'
+        self.assertFalse(is_shareable(self.request, HttpResponse()))
+
+    def test_anonymous_catalog_pages_are_shared(self):
+        category = Category.objects.create(name='Brakes', slug='brakes')
+        brand = Brand.objects.create(name='Bosch', slug='bosch')
+        product = Product.objects.create(
+            name='Brake Pad', sku='BP-0001', category=category, brand=brand, price=10,
+        )
+        for url in [
+            reverse('products:product_list'),
+            reverse('products:category_detail', args=[category.slug]),
+            product.get_absolute_url(),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Surrogate-Key', response)
+                self.assertEqual(response['Surrogate-Control'], 'max-age=600')
+                self.assertFalse(response.cookies)
+                self.assertIn('public', response['Cache-Control'])
+
+    def test_catalog_page_for_visitor_with_a_session_is_private(self):
+        self.client.cookies['sessionid'] = 'key'
+        response = self.client.get(reverse('products:product_list'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('Surrogate-Control', response)
+
+    def test_signed_in_visitor_is_private(self):
+        self.request.user = mock.Mock(is_authenticated=True)
+        self.assertFalse(is_shareable(self.request, HttpResponse()))
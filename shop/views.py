@@ -1,13 +1,18 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_POST
-from django.views.decorators.cache import cache_page
-from django.core.paginator import Paginator
-from django.db.models import Q, Count, Avg, Case, When, F
-from django.core.cache import cache
-
-from products.models import Product, Category, Brand
+from django.db.models import Q, Count
+
+from products.cards import listing_queryset
+from products.models import Category, Brand
+from products.counting import ResultCount
+from products.pagination import paginate_ids, paginate_list
+from products.part_numbers import find_by_part_number, looks_like_part_number
+from products.search import get_search_results
+from .cdn import set_surrogate_keys, product_key, category_key, brand_key, PRODUCT_LIST_KEY, BANNERS_KEY
 from .models import Banner, Newsletter, ContactMessage, SiteSettings
 from .forms import NewsletterForm, ContactForm
 
@@ -19,15 +24,10 @@ def home(request):
         'hero_banners': Banner.objects.filter(banner_type='hero', is_active=True)[:3],
 
         # Featured products
-        'featured_products': Product.objects.filter(
-            is_featured=True,
-            is_active=True
-        ).select_related('brand').prefetch_related('images')[:8],
+        'featured_products': listing_queryset().filter(is_featured=True)[:8],
 
         # New arrivals
-        'new_products': Product.objects.filter(
-            is_active=True
-        ).select_related('brand').prefetch_related('images').order_by('-created_at')[:8],
+        'new_products': listing_queryset().order_by('-created_at')[:8],
 
         # Categories with product count
         'categories': Category.objects.filter(
@@ -42,7 +42,13 @@ def home(request):
         # Newsletter form
         'newsletter_form': NewsletterForm(),
     }
-    return render(request, 'shop/home.html', context)
+    response = render(request, 'shop/home.html', context)
+    return set_surrogate_keys(request, response, [
+        PRODUCT_LIST_KEY, BANNERS_KEY,
+        *(product_key(product.pk) for product in [*context['featured_products'], *context['new_products']]),
+        *(category_key(category.pk) for category in context['categories']),
+        *(brand_key(brand.pk) for brand in context['brands']),
+    ])
 
 
 def about(request):
@@ -112,30 +118,38 @@ def search(request):
     if not query:
         return redirect('products:product_list')
     
-    # Search products
-    products = Product.objects.filter(
-        Q(name__icontains=query) |
-        Q(description__icontains=query) |
-        Q(brand__name__icontains=query) |
-        Q(category__name__icontains=query) |
-        Q(compatible_makes__icontains=query) |
-        Q(compatible_models__icontains=query),
-        is_active=True
-    ).select_related('brand', 'category').prefetch_related('images').distinct()
+    # Part numbers ("0986-494-104") resolve with one exact, indexed lookup of
+    # SKUs and OEM/cross-reference numbers; anything else falls through
+    if looks_like_part_number(query):
+        products = find_by_part_number(listing_queryset(), query)
+        if products:
+            return render(request, 'shop/search_results.html', {
+                'query': query,
+                'products': paginate_list(request, products, 12),
+                'total_results': ResultCount(len(products)),
+            })
+    
+    # Full-text search over name, SKU, brand, category, description and
+    # compatibility; popular queries come from the result id cache
+    product_ids, total_results = get_search_results(query)
     
-    # Pagination
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get('page')
-    products_page = paginator.get_page(page_number)
+    # Only the rows of the displayed page are loaded
+    products_page = paginate_ids(request, product_ids, listing_queryset(), 12)
     
     context = {
         'query': query,
         'products': products_page,
-        'total_results': paginator.count,
+        'total_results': total_results,
     }
     return render(request, 'shop/search_results.html', context)
 
 
+@never_cache
+def csrf_token(request):
+    """CSRF token for forms on pages the caching proxy shares, fetched by base.html."""
+    return JsonResponse({'token': get_token(request)})
+
+
 def privacy_policy(request):
     """Privacy policy page."""
     return render(request, 'shop/privacy_policy.html')